@@ -0,0 +1,65 @@
+# benchmarks/bench_first_paint.py
+"""
+Temps jusqu'au premier affichage de l'application.
+
+Chaque mesure lance un interpréteur neuf qui exécute `main.py` (Streamlit
+en mode nu, sans serveur) et note, depuis le démarrage du script (Streamlit
+déjà importé, comme dans le serveur) :
+
+- `premier_affichage` : le titre de la page est émis ;
+- `navigation` : la barre latérale (sélecteur "Aller à") est émise ;
+- `rendu_complet` : le script de l'onglet par défaut est terminé.
+
+Usage : python -m benchmarks.bench_first_paint [nb_mesures]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MARKS = ('premier_affichage', 'navigation', 'rendu_complet')
+
+CHILD = """
+import json, logging, time
+import streamlit as st
+from streamlit.delta_generator import DeltaGenerator
+started = time.perf_counter()
+logging.disable(logging.WARNING)
+marks = {}
+title, radio = DeltaGenerator.title, DeltaGenerator.radio
+def timed_title(self, *args, **kwargs):
+    marks.setdefault('premier_affichage', time.perf_counter() - started)
+    return title(self, *args, **kwargs)
+def timed_radio(self, label, *args, **kwargs):
+    value = radio(self, label, *args, **kwargs)
+    if label == "Aller à":
+        marks.setdefault('navigation', time.perf_counter() - started)
+    return value
+DeltaGenerator.title, DeltaGenerator.radio = timed_title, timed_radio
+exec(compile(open('main.py', encoding='utf-8').read(), 'main.py', 'exec'), {'__name__': '__main__'})
+marks['rendu_complet'] = time.perf_counter() - started
+print(json.dumps(marks))
+"""
+
+
+def measure_once():
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD], cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(n_runs=5):
+    runs = [measure_once() for _ in range(n_runs)]
+    for mark in MARKS:
+        values = [run[mark] for run in runs if mark in run]
+        if values:
+            print(f"{mark:<18} médiane {statistics.median(values) * 1000:7.0f} ms "
+                  f"(min {min(values) * 1000:.0f}, max {max(values) * 1000:.0f})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(*(int(arg) for arg in sys.argv[1:])))
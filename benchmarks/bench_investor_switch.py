@@ -0,0 +1,103 @@
+# benchmarks/bench_investor_switch.py
+"""
+Benchmark de non-régression : changements successifs d'investisseur dans
+l'onglet "Analyse par Investisseur".
+
+La mémoire et la latence d'un rerun doivent rester stables quel que soit
+le nombre d'investisseurs déjà affichés, et la vue partagée ne doit jamais
+être modifiée. Chaque rerun passe par les fonctions mémoïsées de l'onglet
+(`get_net_performance`, `prepare_series`), comme dans l'application ; une
+fois chaque investisseur affiché, tous les reruns doivent être servis par
+le cache.
+
+Usage : python -m benchmarks.bench_investor_switch [nb_changements]
+"""
+import gc
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from dashboard import profiling
+from dashboard.fees import NET_FIELDS
+from dashboard.ledger import build_ledger
+from dashboard.nav import compute_units
+from tabs.graphiques import prepare_series
+from tabs.onglet_investisseurs import build_chart_data, build_performance_figure, build_value_figure, get_net_performance
+
+N_DAYS = 10 * 365
+# Cache de `get_net_performance` (max_entries) : au-delà, chaque rerun serait un échec
+CACHE_ENTRIES = 32
+N_INVESTORS = 24
+MAX_MEMORY_GROWTH = 1.10
+MAX_LATENCY_GROWTH = 1.50
+# Colonnes de la vue mémoïsée, qui ne doivent pas changer d'un rerun à l'autre
+VIEW_COLUMNS = ['Date', 'capital', 'valeur_part', *NET_FIELDS]
+
+
+def synthetic_ledger(n_days=N_DAYS, n_investors=N_INVESTORS, seed=0):
+    """Registre synthétique : apports épars et valeur de portefeuille en marche aléatoire."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2015-01-01', periods=n_days, freq='D')
+    inflows = np.where(rng.random((n_days, n_investors)) < 0.01, rng.uniform(100, 2000, (n_days, n_investors)), 0.0)
+    capital = inflows.sum(axis=1).cumsum()
+    portfolio_value = capital * np.exp(np.cumsum(rng.normal(0.0002, 0.01, n_days)))
+    investors = [f'Investisseur {i:03d}' for i in range(n_investors)]
+    nav_result = compute_units(inflows, portfolio_value)
+    return build_ledger(dates, portfolio_value, inflows, investors, nav_result, 'synthetique')
+
+
+def rerun(ledger, investor):
+    """Équivalent d'un rerun de l'onglet : vue mémoïsée, séries sous-échantillonnées, figures."""
+    df_perf = get_net_performance(ledger, ledger.cache_key, investor)
+    chart_data = prepare_series(build_chart_data(df_perf), 'Date', ['perc_net_gain', 'capital', 'valeur_part'])
+    build_performance_figure(chart_data, investor)
+    build_value_figure(chart_data, investor)
+    return df_perf
+
+
+def main(n_switches=300):
+    ledger = synthetic_ledger()
+    assert len(ledger.investors) <= CACHE_ENTRIES
+    get_net_performance.clear()
+    latencies, memory, misses = [], [], []
+    tracemalloc.start()
+    for k in range(n_switches):
+        investor = ledger.investors[k % len(ledger.investors)]
+        # Temps CPU du processus : insensible aux autres processus de la machine
+        profiler = profiling.start_run(enabled=True, label=investor)
+        started = time.process_time()
+        df_perf = rerun(ledger, investor)
+        latencies.append(time.process_time() - started)
+        misses.append(profiler.misses('perf_nette'))
+        if list(df_perf.columns) != VIEW_COLUMNS:
+            print(f"ÉCHEC : la vue de {investor} a été modifiée ({VIEW_COLUMNS} -> {list(df_perf.columns)})")
+            return 1
+        # Les figures Plotly contiennent des cycles : on mesure la mémoire réellement retenue
+        gc.collect()
+        memory.append(tracemalloc.get_traced_memory()[0])
+    tracemalloc.stop()
+
+    # Comparaison des reruns "à chaud" (vues déjà en cache) du début et de la fin
+    warm = slice(len(ledger.investors), None)
+    warm_latencies, warm_memory = latencies[warm], memory[warm]
+    if sum(misses[warm]):
+        print(f"ÉCHEC : {sum(misses[warm])} reruns à chaud non servis par le cache de get_net_performance")
+        return 1
+    window = max(1, len(warm_latencies) // 10)
+    latency_growth = statistics.median(warm_latencies[-window:]) / statistics.median(warm_latencies[:window])
+    memory_growth = warm_memory[-1] / warm_memory[0]
+    print(f"{n_switches} changements, {len(ledger.investors)} investisseurs, {len(ledger.dates)} jours")
+    print(f"latence médiane à chaud : {statistics.median(warm_latencies) * 1000:.1f} ms (x{latency_growth:.2f} fin/début)")
+    print(f"mémoire : {warm_memory[0] / 1e6:.1f} Mo -> {warm_memory[-1] / 1e6:.1f} Mo (x{memory_growth:.2f})")
+    if memory_growth > MAX_MEMORY_GROWTH or latency_growth > MAX_LATENCY_GROWTH:
+        print("ÉCHEC : la mémoire ou la latence augmente avec le nombre de changements")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(*(int(arg) for arg in sys.argv[1:])))
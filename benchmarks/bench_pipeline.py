@@ -0,0 +1,257 @@
+# benchmarks/bench_pipeline.py
+"""
+Benchmark du pipeline complet sur un portefeuille synthétique.
+
+Un générateur écrit, à l'échelle demandée, des fichiers au format de
+`data/` (apports, série du PEA, sources, relevés de positions CSV) ; chaque
+étape est chronométrée (meilleur de plusieurs passes) puis rejouée sous
+tracemalloc pour son pic mémoire. Les résultats sont comparés à la
+référence `benchmarks/baseline_pipeline.json` : une étape régresse si elle
+est plus lente de MAX_TIME_GROWTH et si l'écart dépasse le bruit mesuré
+(dispersion des passes, ici ou dans la référence).
+
+Périmètre des étapes, à garder en tête en comparant des références :
+`pipeline_froid` ne lit pas les relevés de positions (lus par l'onglet
+d'analyse, mesurés par `lecture_positions`), et `lecture_positions` comme
+`pipeline_froid` comprennent la validation des fichiers par leur schéma.
+
+Usage : python -m benchmarks.bench_pipeline [--annees 10] [--investisseurs 200]
+        [--sources 20] [--maj-reference]
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import dashboard.cache
+from dashboard.allocation import current_allocation, group_allocation
+from dashboard.fees import DEFAULT_SCENARIOS, apply_fees_and_taxes, fee_scenarios, net_performance
+from dashboard.metrics import investor_metrics
+from dashboard.pipeline import load_and_process_all_data
+from dashboard.portfolios import Portfolio
+from dashboard.positions import PositionsStore, parse_positions_csv, position_history
+from dashboard.sources import _cached_source_values
+from tabs.graphiques import prepare_series
+from tabs.onglet_analyse import build_allocation_figure, build_assets_figure, build_lines_figure
+from tabs.onglet_investisseurs import build_chart_data, build_performance_figure, build_value_figure
+
+BENCH_DIR = os.path.join(dashboard.cache.CACHE_DIR, 'benchmarks')
+BENCH_CACHE_DIR = os.path.join(BENCH_DIR, 'cache')
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline_pipeline.json')
+REPEAT = 7
+MAX_TIME_GROWTH = 1.50
+MAX_MEMORY_GROWTH = 1.20
+# Un écart de temps inférieur à NOISE_FACTOR fois la dispersion des passes relève du bruit
+NOISE_FACTOR = 3.0
+# En dessous, les écarts de pic mémoire relèvent du bruit de mesure
+MIN_MEGABYTES = 1.0
+MONTH_NAMES = ['Janvier', 'Fevrier', 'Mars', 'Avril', 'Mai', 'Juin', 'Juillet', 'Aout',
+               'Septembre', 'Octobre', 'Novembre', 'Decembre']
+LINES_PER_SNAPSHOT = 30
+
+
+def generate_portfolio(directory, years=10, n_investors=200, n_sources=20, seed=0):
+    """
+    Portefeuille synthétique se terminant aujourd'hui : environ un apport
+    mensuel par investisseur réparti sur les sources (dont le PEA), une
+    série de valeur du PEA en marche aléatoire et un relevé de positions
+    par fin de mois.
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(os.path.join(directory, 'Positions'), exist_ok=True)
+    today = pd.Timestamp('today').normalize()
+    dates = pd.date_range(today - pd.DateOffset(years=years), today, freq='D')
+    investors = [f'Investisseur {i:03d}' for i in range(n_investors)]
+    sources = ['PEA'] + [f'Source {k:02d}' for k in range(1, n_sources)]
+
+    n_rows = n_investors * years * 12
+    df_apports = pd.DataFrame({
+        'Date': dates[rng.integers(0, len(dates), n_rows)],
+        'NomInvestisseur': np.array(investors)[rng.integers(0, n_investors, n_rows)],
+        'Montant': rng.uniform(50, 2000, n_rows).round(2),
+        'SourcePlacement': np.where(
+            rng.random(n_rows) < 0.3, 'PEA', np.array(sources[1:] or ['PEA'])[rng.integers(0, max(1, n_sources - 1), n_rows)]
+        ),
+    }).sort_values('Date', ignore_index=True)
+    df_apports.to_excel(os.path.join(directory, 'apports_investisseurs.xlsx'), index=False)
+
+    methods = ['apports', 'taux_fixe', 'capitalisation_quotidienne']
+    pd.DataFrame({
+        'NomSource': sources,
+        'TypeSource': ['PEA'] + ['Placement'] * (n_sources - 1),
+        'Valorisation': [None] + [methods[k % len(methods)] for k in range(n_sources - 1)],
+        'Taux': [None] + list(rng.uniform(2, 8, n_sources - 1).round(2)),
+    }).to_excel(os.path.join(directory, 'sources_placement.xlsx'), index=False)
+
+    pea = df_apports[df_apports['SourcePlacement'] == 'PEA']
+    pea_capital = pea.groupby('Date')['Montant'].sum().reindex(dates, fill_value=0).cumsum().to_numpy()
+    pea_value = pea_capital * np.exp(np.cumsum(rng.normal(0.0002, 0.01, len(dates))))
+    pd.DataFrame({'Date': dates, 'Valorisation portefeuille': pea_value.round(2)}).to_excel(
+        os.path.join(directory, 'performance_pea.xlsx'), index=False
+    )
+
+    isins = [f'FR{n:010d}' for n in rng.choice(10 ** 9, LINES_PER_SNAPSHOT * 2, replace=False)]
+    for month_end in pd.date_range(dates[0], today, freq='ME'):
+        held = rng.choice(len(isins), LINES_PER_SNAPSHOT, replace=False)
+        last_price = rng.uniform(5, 500, LINES_PER_SNAPSHOT).round(2)
+        quantity = rng.integers(1, 500, LINES_PER_SNAPSHOT).astype(float)
+        pd.DataFrame({
+            'name': [f'LIGNE {i:02d}' for i in held], 'isin': np.array(isins)[held], 'quantity': quantity,
+            'buyingPrice': (last_price * rng.uniform(0.8, 1.2, LINES_PER_SNAPSHOT)).round(2), 'lastPrice': last_price,
+            'intradayVariation': rng.normal(0, 1, LINES_PER_SNAPSHOT).round(2), 'amount': (quantity * last_price).round(2),
+            'amountVariation': 0.0, 'variation': 0.0,
+        }).to_csv(
+            os.path.join(directory, 'Positions', f'{MONTH_NAMES[month_end.month - 1]}_{month_end.year}.csv'),
+            sep=';', decimal=',', encoding='utf-8-sig', index=False
+        )
+    return Portfolio('Benchmark', directory)
+
+
+def synthetic_portfolio(years, n_investors, n_sources):
+    """Portefeuille synthétique généré une fois par échelle (et par jour) puis réutilisé."""
+    scale = f'{years}a-{n_investors}i-{n_sources}s-{pd.Timestamp("today"):%Y%m%d}'
+    directory = os.path.join(BENCH_DIR, 'donnees', scale)
+    if not os.path.exists(os.path.join(directory, 'apports_investisseurs.xlsx')):
+        shutil.rmtree(os.path.join(BENCH_DIR, 'donnees'), ignore_errors=True)
+        generate_portfolio(directory, years, n_investors, n_sources)
+    return Portfolio('Benchmark', directory)
+
+
+def clear_caches():
+    """Démarrage à froid : caches disque (Parquet, état NAV) et mémoire vidés."""
+    shutil.rmtree(BENCH_CACHE_DIR, ignore_errors=True)
+    _cached_source_values.cache_clear()
+
+
+def measure(func, setup=None, repeat=REPEAT):
+    """
+    (meilleur temps en secondes, dispersion en secondes, pic mémoire en Mo,
+    résultat) d'une étape. La dispersion est l'écart entre le temps médian
+    et le meilleur des `repeat` passes.
+    """
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        gc.collect()
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    if setup:
+        setup()
+    gc.collect()
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, statistics.median(timings) - best, peak / 1e6, result
+
+
+def investor_figures(ledger, investor):
+    df_perf = net_performance(ledger, investor)
+    chart_data = prepare_series(build_chart_data(df_perf), 'Date', ['perc_net_gain', 'capital', 'valeur_part'])
+    return build_performance_figure(chart_data, investor), build_value_figure(chart_data, investor)
+
+
+def analysis_figures(df_global_value, store):
+    df_history = df_global_value.rename_axis('Date').reset_index()
+    asset_columns = [col for col in df_global_value.columns if col != 'PortfolioValue_Global']
+    fig_area = build_assets_figure(prepare_series(df_history, 'Date', asset_columns), asset_columns)
+    df_lines = position_history(store, df_global_value.index)
+    line_columns = list(df_lines.columns)
+    fig_lines = build_lines_figure(prepare_series(df_lines.rename_axis('Date').reset_index(), 'Date', line_columns), line_columns)
+    _, df_positions = store.latest()
+    df_assets = current_allocation(df_positions, df_global_value.iloc[-1][asset_columns].astype(float))
+    fig_bar = build_allocation_figure(group_allocation(df_assets, 'Actif'), 'Actif')
+    return fig_area, fig_lines, fig_bar
+
+
+def run(portfolio):
+    """Mesures de chaque étape : {étape: {'secondes': ..., 'bruit_secondes': ..., 'memoire_pic_mo': ...}}."""
+    results = {}
+
+    def record(stage, measurement):
+        seconds, noise, megabytes, result = measurement
+        results[stage] = {'secondes': round(seconds, 4), 'bruit_secondes': round(noise, 4), 'memoire_pic_mo': round(megabytes, 2)}
+        print(f"{stage:<22} {seconds * 1000:9.1f} ms ±{noise * 1000:7.1f} ms {megabytes:9.1f} Mo")
+        return result
+
+    record('pipeline_froid', measure(lambda: load_and_process_all_data(portfolio), setup=clear_caches))
+    ledger, _, df_global_value = record('pipeline_chaud', measure(lambda: load_and_process_all_data(portfolio)))
+    net_ledger = record('frais_impots', measure(lambda: apply_fees_and_taxes(ledger)))
+    record('scenarios_frais', measure(lambda: fee_scenarios(ledger, ledger.investors[0], DEFAULT_SCENARIOS)))
+    record('indicateurs', measure(lambda: investor_metrics(net_ledger)))
+    paths = list(PositionsStore(portfolio.positions_dir).paths.values())
+    record('lecture_positions', measure(lambda: [parse_positions_csv(path) for path in paths]))
+    record('figures_investisseur', measure(lambda: investor_figures(ledger, ledger.investors[0])))
+    store = PositionsStore(portfolio.positions_dir).load_all()
+    record('figures_analyse', measure(lambda: analysis_figures(df_global_value, store)))
+    return results
+
+
+def compare(results, baseline):
+    """Étapes plus lentes ou plus gourmandes que la référence (au-delà des seuils)."""
+    regressions = []
+    for stage, current in results.items():
+        reference = baseline.get(stage)
+        if reference is None:
+            continue
+        # Les références antérieures ne portent pas de dispersion : seule celle de la mesure compte
+        noise = max(current['bruit_secondes'], reference.get('bruit_secondes', 0.0))
+        if current['secondes'] > reference['secondes'] * MAX_TIME_GROWTH \
+                and current['secondes'] - reference['secondes'] > NOISE_FACTOR * noise:
+            regressions.append(f"{stage} : {reference['secondes']:.3f} s -> {current['secondes']:.3f} s")
+        if current['memoire_pic_mo'] > MIN_MEGABYTES \
+                and current['memoire_pic_mo'] > reference['memoire_pic_mo'] * MAX_MEMORY_GROWTH:
+            regressions.append(f"{stage} : {reference['memoire_pic_mo']:.1f} Mo -> {current['memoire_pic_mo']:.1f} Mo")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.bench_pipeline')
+    parser.add_argument('--annees', type=int, default=10)
+    parser.add_argument('--investisseurs', type=int, default=200)
+    parser.add_argument('--sources', type=int, default=20)
+    parser.add_argument('--maj-reference', action='store_true', help="enregistre ces mesures comme référence")
+    args = parser.parse_args(argv)
+
+    portfolio = synthetic_portfolio(args.annees, args.investisseurs, args.sources)
+    # Caches du benchmark isolés de ceux de l'application
+    dashboard.cache.CACHE_DIR = BENCH_CACHE_DIR
+    scale = {'annees': args.annees, 'investisseurs': args.investisseurs, 'sources': args.sources}
+    print(f"{args.annees} ans x {args.investisseurs} investisseurs x {args.sources} sources")
+    results = run(portfolio)
+
+    if args.maj_reference:
+        with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+            json.dump({'echelle': scale, 'machine': platform.platform(), 'python': platform.python_version(),
+                       'etapes': results}, f, indent=2)
+            f.write('\n')
+        print(f"Référence enregistrée dans {BASELINE_FILE}")
+        return 0
+    if not os.path.exists(BASELINE_FILE):
+        print("Pas de référence : relancer avec --maj-reference")
+        return 0
+    with open(BASELINE_FILE, encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline['echelle'] != scale:
+        print(f"Référence mesurée à une autre échelle ({baseline['echelle']}) : pas de comparaison")
+        return 0
+    regressions = compare(results, baseline['etapes'])
+    for regression in regressions:
+        print(f"RÉGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,71 @@
+# dashboard/__main__.py
+"""
+Calcul hors navigateur : python -m dashboard compute [--portefeuille NOM]
+
+Exécute le calcul complet (NAV, parts, frais et impôt latent) de chaque
+portefeuille du registre et écrit les artefacts relus par l'application,
+par exemple depuis une tâche planifiée après la mise à jour du fichier PEA.
+"""
+import argparse
+import dataclasses
+import logging
+import sys
+import time
+
+from dashboard import profiling
+from dashboard.fees import CRYSTALLIZATIONS, DEFAULT_MODEL, FeeModel
+from dashboard.pipeline import compute_and_export
+from dashboard.portfolios import REGISTRY_FILE, load_registry
+from dashboard.schema import SchemaError
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m dashboard')
+    commands = parser.add_subparsers(dest='command', required=True)
+    compute = commands.add_parser('compute', help="calcule et exporte les artefacts des portefeuilles")
+    compute.add_argument('--portefeuille', action='append', help="portefeuille à calculer (tous par défaut)")
+    compute.add_argument('--registre', default=REGISTRY_FILE, help="registre des portefeuilles")
+    compute.add_argument('--frais', type=float, default=DEFAULT_MODEL.fee_rate, help="taux de frais de gestion")
+    compute.add_argument('--impot', type=float, default=DEFAULT_MODEL.tax_rate, help="taux d'impôt sur la plus-value")
+    compute.add_argument('--hurdle', type=float, default=DEFAULT_MODEL.hurdle, help="rendement annuel minimal avant frais")
+    compute.add_argument('--hwm', action='store_true', help="frais au-delà du plus haut (high-water mark)")
+    compute.add_argument('--cristallisation', choices=list(CRYSTALLIZATIONS.values()),
+                         default=DEFAULT_MODEL.crystallization, help="période de calcul des frais")
+    compute.add_argument('--profil', action='store_true', help="affiche et exporte la durée de chaque étape")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s %(name)s : %(message)s')
+    portfolios = load_registry(args.registre)
+    names = args.portefeuille or list(portfolios)
+    unknown = [name for name in names if name not in portfolios]
+    if unknown:
+        parser.error(f"portefeuille inconnu : {', '.join(unknown)}")
+
+    model = FeeModel(args.frais, args.impot, args.hurdle, args.hwm, args.cristallisation, 'Barème de la commande')
+    if model == dataclasses.replace(DEFAULT_MODEL, name=model.name):
+        model = DEFAULT_MODEL
+    status = 0
+    for name in names:
+        profiler = profiling.start_run(args.profil or None, label=f"compute / {name}")
+        started = time.perf_counter()
+        try:
+            ledger, _, _ = compute_and_export(portfolios[name], model)
+        except FileNotFoundError as e:
+            print(f"{name} : fichier manquant {e.filename}", file=sys.stderr)
+            status = 1
+            continue
+        except SchemaError as e:
+            print(f"{name} : {e}", file=sys.stderr)
+            status = 1
+            continue
+        print(f"{name} : {len(ledger.dates)} jours x {len(ledger.investors)} investisseurs "
+              f"exportés en {time.perf_counter() - started:.2f} s")
+        if profiler.enabled:
+            for stage in profiler.stages:
+                print(f"  {'  ' * stage['profondeur']}{stage['etape']:<20} {stage['secondes'] * 1000:8.1f} ms")
+            print(f"  mesures ajoutées à {profiler.export()}")
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
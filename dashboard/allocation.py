@@ -0,0 +1,55 @@
+# dashboard/allocation.py
+import numpy as np
+import pandas as pd
+
+CASH_LABEL = 'Liquidité (Cash PEA)'
+
+# Regroupements proposés pour la répartition : libellé -> colonne de la table
+GROUPINGS = {'Actif': 'Actif', 'Type': 'Type', 'Pays (préfixe ISIN)': 'Pays'}
+
+
+def current_allocation(df_positions, last_values, pea_column='PEA'):
+    """
+    Table de répartition actuelle : une ligne par position du PEA, une ligne
+    de liquidité (PEA total moins positions, si positive) et une ligne par
+    source hors PEA, construite par colonnes entières (pas de boucle par ligne).
+
+    `last_values` : valeur du dernier jour par source (Series source -> valeur).
+    Colonnes : Actif, Type, ISIN, Pays, Valeur ; triée par valeur décroissante.
+    """
+    valeur_pea_total = last_values.get(pea_column, 0)
+    parts = []
+    valeur_actions_investies = 0
+    if df_positions is not None:
+        valeur_actions_investies = df_positions['Valeur'].sum()
+        parts.append(pd.DataFrame({
+            'Actif': df_positions['name'].to_numpy(),
+            'Type': 'Action PEA',
+            'ISIN': df_positions['isin'].to_numpy(),
+            'Valeur': df_positions['Valeur'].to_numpy(dtype=float),
+        }))
+    liquidite_pea = max(0, valeur_pea_total - valeur_actions_investies)
+    parts.append(pd.DataFrame({'Actif': [CASH_LABEL], 'Type': 'Cash', 'ISIN': None, 'Valeur': [liquidite_pea]}))
+    other_sources = last_values.drop(pea_column, errors='ignore')
+    parts.append(pd.DataFrame({
+        'Actif': other_sources.index.to_numpy(), 'Type': 'Autre', 'ISIN': None,
+        'Valeur': other_sources.to_numpy(dtype=float),
+    }))
+
+    df_assets = pd.concat(parts, ignore_index=True)
+    df_assets['Pays'] = np.where(df_assets['ISIN'].notna(), df_assets['ISIN'].str[:2], df_assets['Type'])
+    df_assets = df_assets[df_assets['Valeur'].notna() & (df_assets['Valeur'].abs() > 0.01)]
+    return df_assets.sort_values('Valeur', ascending=False, ignore_index=True)
+
+
+def liquidity(df_assets):
+    """Liquidité du PEA lue dans la table de répartition."""
+    return df_assets.loc[df_assets['Type'] == 'Cash', 'Valeur'].sum()
+
+
+def group_allocation(df_assets, grouping):
+    """Répartition regroupée (par type, préfixe ISIN...) sans relire les relevés."""
+    column = GROUPINGS[grouping]
+    if column == 'Actif':
+        return df_assets
+    return df_assets.groupby(column, as_index=False)['Valeur'].sum().sort_values('Valeur', ascending=False, ignore_index=True)
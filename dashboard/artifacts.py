@@ -0,0 +1,152 @@
+# dashboard/artifacts.py
+"""
+Artefacts précalculés d'un portefeuille, écrits par `python -m dashboard
+compute` et relus par l'application sans recalcul.
+
+Chaque export est un dossier `.cache/<portefeuille>/artifacts/<horodatage>/`
+(un .npy par vecteur ou matrice, les tables en Parquet, `meta.json`) ;
+`current.json` désigne le dernier export complet. Un export est écrit
+dans un dossier temporaire renommé une fois complet ; seuls les exports
+complets antérieurs à celui publié sont supprimés, jamais celui qu'un
+autre calcul est en train d'écrire. La suppression n'est faite qu'au
+mieux : sous Windows, un fichier projeté en mémoire par l'application ne
+peut pas être effacé.
+"""
+import dataclasses
+import json
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from dashboard.cache import cache_path
+from dashboard.fees import FeeModel
+from dashboard.ledger import InvestorLedger
+
+ARTIFACTS_DIR = 'artifacts'
+CURRENT_FILE = 'current.json'
+VECTORS = ('nav', 'total_units', 'portfolio_value')
+# Version du contenu des exports : un export d'une autre version est recalculé
+FORMAT_VERSION = 2
+# Dossier d'un export en cours d'écriture
+TMP_PREFIX = '_'
+# Âge au-delà duquel un export jamais terminé est supprimé
+STALE_TMP_SECONDS = 3600
+
+
+def artifacts_root(portfolio):
+    return os.path.dirname(cache_path(portfolio.slug, ARTIFACTS_DIR, CURRENT_FILE))
+
+
+def export_artifacts(portfolio, ledger, df_apports, df_global_value):
+    """Écrit un nouvel export puis le désigne comme courant (remplacement atomique)."""
+    root = artifacts_root(portfolio)
+    version = f'{time.time_ns()}-{os.getpid()}-{threading.get_ident()}'
+    directory = os.path.join(root, TMP_PREFIX + version)
+    os.makedirs(directory)
+
+    np.save(os.path.join(directory, 'dates.npy'), ledger.dates.to_numpy())
+    for name in VECTORS:
+        np.save(os.path.join(directory, f'{name}.npy'), getattr(ledger, name))
+    for name, matrix in ledger.matrices.items():
+        np.save(os.path.join(directory, f'matrix_{name}.npy'), np.ascontiguousarray(matrix))
+    df_apports.to_parquet(os.path.join(directory, 'apports.parquet'), index=False)
+    df_global_value.to_parquet(os.path.join(directory, 'valeurs.parquet'))
+    meta = {
+        'format': FORMAT_VERSION,
+        'portfolio': portfolio.name,
+        # Fichiers d'entrée du calcul, classeurs de valorisation compris
+        'signature': [list(entry) for entry in portfolio.input_signature()],
+        'day': f"{pd.Timestamp('today'):%Y-%m-%d}",
+        'investors': list(ledger.investors),
+        'matrices': list(ledger.matrices),
+        'fingerprint': ledger.fingerprint,
+        'fee_model': dataclasses.asdict(ledger.fee_model) if ledger.fee_model else None,
+    }
+    with open(os.path.join(directory, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(directory, os.path.join(root, version))
+    directory = os.path.join(root, version)
+
+    tmp_file = os.path.join(root, f'{CURRENT_FILE}.{version}.tmp')
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump({'version': version}, f)
+    os.replace(tmp_file, os.path.join(root, CURRENT_FILE))
+    _remove_old_versions(root, version)
+    return directory
+
+
+def load_artifacts(portfolio):
+    """
+    (registre, apports, valeurs par source) lus dans le dernier export, les
+    vecteurs et matrices étant projetés en mémoire (`mmap_mode='r'`).
+    Retourne None si l'export manque ou si l'un des fichiers d'entrée
+    (`Portfolio.input_files`) ou le jour a changé depuis.
+    """
+    directory, meta = _current_export(portfolio)
+    if meta is None:
+        return None
+    if meta.get('format') != FORMAT_VERSION or meta['signature'] != [list(entry) for entry in portfolio.input_signature()] or meta['day'] != f"{pd.Timestamp('today'):%Y-%m-%d}":
+        return None
+
+    def mapped(name):
+        return np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r')
+
+    ledger = InvestorLedger(
+        dates=pd.DatetimeIndex(mapped('dates')),
+        investors=meta['investors'],
+        matrices={name: mapped(f'matrix_{name}') for name in meta['matrices']},
+        **{name: mapped(name) for name in VECTORS},
+        fingerprint=meta['fingerprint'],
+        fee_model=FeeModel(**meta['fee_model']) if meta.get('fee_model') else None,
+    )
+    df_apports = pd.read_parquet(os.path.join(directory, 'apports.parquet'))
+    df_global_value = pd.read_parquet(os.path.join(directory, 'valeurs.parquet'))
+    return ledger, df_apports, df_global_value
+
+
+def exported_fee_model(portfolio):
+    """Barème du dernier export, même périmé (None sans export ou sans barème)."""
+    _, meta = _current_export(portfolio)
+    return FeeModel(**meta['fee_model']) if meta and meta.get('fee_model') else None
+
+
+def _current_export(portfolio):
+    """(dossier, métadonnées) du dernier export ; (None, None) s'il manque ou est illisible."""
+    root = artifacts_root(portfolio)
+    try:
+        with open(os.path.join(root, CURRENT_FILE), encoding='utf-8') as f:
+            directory = os.path.join(root, json.load(f)['version'])
+        with open(os.path.join(directory, 'meta.json'), encoding='utf-8') as f:
+            return directory, json.load(f)
+    except (OSError, ValueError, KeyError, TypeError):
+        return None, None
+
+
+def _remove_old_versions(root, current):
+    """
+    Supprime les exports complets antérieurs à `current`, et les dossiers
+    temporaires abandonnés (calcul interrompu) depuis plus de `STALE_TMP_SECONDS`.
+    """
+    published = _version_time(current)
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if not os.path.isdir(path):
+            continue
+        if name.startswith(TMP_PREFIX):
+            stale = _version_time(name[len(TMP_PREFIX):]) < time.time_ns() - STALE_TMP_SECONDS * 10**9
+        else:
+            stale = _version_time(name) < published
+        if stale:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def _version_time(version):
+    """Horodatage (ns) d'un nom de version ; 0 pour un dossier inconnu."""
+    try:
+        return int(version.split('-')[0])
+    except ValueError:
+        return 0
@@ -0,0 +1,23 @@
+# dashboard/cache.py
+import hashlib
+import os
+
+# Dossier des fichiers de cache générés (exclu par .gitignore)
+CACHE_DIR = '.cache'
+
+
+def cache_path(*parts):
+    """Chemin dans le dossier de cache, en créant les dossiers parents."""
+    path = os.path.join(CACHE_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def file_fingerprint(*paths):
+    """Empreinte SHA-256 du contenu d'un ou plusieurs fichiers."""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
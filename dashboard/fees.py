@@ -0,0 +1,168 @@
+# dashboard/fees.py
+import dataclasses
+
+import numpy as np
+
+NET_FIELDS = ('gain_brut', 'taxe_latente', 'frais_gestion', 'frais_preleves', 'valeur_part_nette')
+# Fréquences de cristallisation proposées : libellé -> clé pandas de période
+CRYSTALLIZATIONS = {'Annuelle': 'Y', 'Trimestrielle': 'Q', 'Mensuelle': 'M'}
+
+
+@dataclasses.dataclass(frozen=True)
+class FeeModel:
+    """
+    Barème de frais et d'impôt appliqué aux investisseurs.
+
+    - `fee_rate` : commission sur le profit de la période, acquise en fin
+      de période et provisionnée au prorata de la période écoulée ;
+    - `tax_rate` : impôt latent sur la plus-value ;
+    - `hurdle` : rendement annuel minimal avant commission, appliqué à la
+      valeur de début de période augmentée des apports de la période ;
+    - `high_water_mark` : la commission n'est due qu'au-delà du plus haut
+      gain atteint en début de période depuis l'entrée ;
+    - `crystallization` : période de calcul de la commission ('Y', 'Q',
+      'M'). À chaque nouvelle période la commission acquise est prélevée et
+      reste déduite de la valeur nette ; seule celle de la période en cours
+      est provisionnée.
+    """
+    fee_rate: float = 0.02
+    tax_rate: float = 0.30
+    hurdle: float = 0.0
+    high_water_mark: bool = False
+    crystallization: str = 'Y'
+    name: str = 'Barème actuel'
+
+
+DEFAULT_MODEL = FeeModel()
+# Barèmes comparés par défaut dans l'onglet investisseur
+DEFAULT_SCENARIOS = (
+    DEFAULT_MODEL,
+    FeeModel(fee_rate=0.0, name='Sans commission'),
+    FeeModel(high_water_mark=True, name='High-water mark'),
+    FeeModel(hurdle=0.05, name='Hurdle 5 %'),
+    FeeModel(fee_rate=0.10, high_water_mark=True, crystallization='Q', name='10 % trimestriel + HWM'),
+)
+
+
+def fees_and_taxes(valeur_part, capital, calendar, model=DEFAULT_MODEL, rows=None):
+    """
+    Commission et impôt latent pour un vecteur ou une matrice de valeurs
+    indexée par jour en première dimension.
+
+    La commission d'une période est `fee_rate` du profit de toute la
+    période, acquise à son dernier jour : `frais_gestion` en est la
+    provision au prorata de la période écoulée, `frais_preleves` le cumul
+    des commissions des périodes closes. Les deux sont déduits de la
+    valeur nette, quelle que soit la cristallisation.
+
+    `model` est un `FeeModel` ou une liste de barèmes : dans ce cas chaque
+    grandeur gagne un premier axe « scénario » et tous les barèmes sont
+    évalués en une seule passe vectorisée.
+
+    `calendar` vient de `InvestorLedger.calendar` : les lignes de début de
+    période et les fractions écoulées ne sont calculées qu'une fois.
+    `rows` restreint le calcul à certaines lignes (fenêtre affichée).
+    """
+    models = [model] if isinstance(model, FeeModel) else list(model)
+    row_numbers = np.arange(len(valeur_part))[rows if rows is not None else slice(None)]
+    if rows is None:
+        rows = slice(None)
+    tax_rate = np.array([m.tax_rate for m in models], dtype=float).reshape(-1, *(1,) * valeur_part.ndim)
+
+    gain = valeur_part - capital
+    gain_brut = gain[rows]
+    marks = [_high_water_marks(gain, calendar[m.crystallization][0]) if m.high_water_mark else None for m in models]
+    frais_gestion = _provisions(valeur_part, capital, gain, calendar, models, marks, rows)
+    frais_preleves = np.zeros_like(frais_gestion)
+    for s, m in enumerate(models):
+        # Dernier jour de chaque période close : provision complète, prélevée le lendemain
+        end_rows = np.flatnonzero(np.diff(calendar[m.crystallization][0]))
+        if len(end_rows):
+            crystallized = _provisions(valeur_part, capital, gain, calendar, [m], [marks[s]], end_rows)[0]
+            totals = np.concatenate([np.zeros((1, *crystallized.shape[1:])), np.cumsum(crystallized, axis=0)])
+            frais_preleves[s] = totals[np.searchsorted(end_rows, row_numbers, side='left')]
+
+    taxe_latente = gain_brut.clip(min=0) * tax_rate
+    net = {
+        'gain_brut': np.broadcast_to(gain_brut, taxe_latente.shape),
+        'taxe_latente': taxe_latente,
+        'frais_gestion': frais_gestion,
+        'frais_preleves': frais_preleves,
+        'valeur_part_nette': valeur_part[rows] - taxe_latente - frais_gestion - frais_preleves,
+    }
+    if isinstance(model, FeeModel):
+        return {field: values[0] for field, values in net.items()}
+    return net
+
+
+def _provisions(valeur_part, capital, gain, calendar, models, marks, rows):
+    """
+    Commission provisionnée sur la période en cours aux lignes `rows`, par
+    barème : `fee_rate` du profit de la période au-delà de la référence
+    (gain de début de période ou high-water mark `marks`) et du hurdle,
+    au prorata de la période écoulée.
+    """
+    # Paramètres des barèmes en colonnes (scénarios, 1[, 1]) pour la diffusion
+    extra_axes = (1,) * valeur_part.ndim
+    fee_rate, hurdle = (
+        np.array([getattr(m, field) for m in models], dtype=float).reshape(-1, *extra_axes)
+        for field in ('fee_rate', 'hurdle')
+    )
+    start_rows = np.stack([calendar[m.crystallization][0][rows] for m in models])
+    year_fraction = np.stack([calendar[m.crystallization][1][rows] for m in models])
+    period_fraction = np.stack([calendar[m.crystallization][2][rows] for m in models])
+    if valeur_part.ndim == 2:
+        year_fraction, period_fraction = year_fraction[..., None], period_fraction[..., None]
+
+    reference = gain[start_rows]
+    for s, mark in enumerate(marks):
+        if mark is not None:
+            reference[s] = mark[rows]
+    # Le hurdle est un taux annuel : il court sur la fraction d'année écoulée
+    base_periode = valeur_part[start_rows] + (capital[rows] - capital[start_rows])
+    profit_periode = gain[rows] - reference - hurdle * base_periode * year_fraction
+    return profit_periode.clip(min=0) * fee_rate * period_fraction
+
+
+def _high_water_marks(gain, start_rows):
+    """Plus haut gain atteint en début de période, de la première période à celle de chaque jour."""
+    period_starts, period_index = np.unique(start_rows, return_inverse=True)
+    marks = np.maximum.accumulate(gain[period_starts], axis=0)
+    return marks[period_index]
+
+
+def apply_fees_and_taxes(ledger, model=DEFAULT_MODEL):
+    """Commission et impôt latent pour tous les investisseurs à la fois."""
+    net = fees_and_taxes(ledger.matrices['valeur_part'], ledger.matrices['capital'], ledger.calendar, model)
+    return dataclasses.replace(ledger.with_matrices(**net), fee_model=model)
+
+
+def net_performance(ledger, investor, model=DEFAULT_MODEL, rows=None):
+    """
+    Performance nette d'un seul investisseur : seule sa colonne est calculée,
+    et seulement pour les lignes `rows` (toutes par défaut).
+    Retourne un DataFrame Date / capital / valeur_part / gain_brut /
+    taxe_latente / frais_gestion / frais_preleves / valeur_part_nette.
+
+    Si le registre porte déjà les grandeurs nettes de ce barème (artefacts
+    précalculés), elles sont lues telles quelles.
+    """
+    if ledger.fee_model == model:
+        return ledger.investor_frame(investor, ['capital', 'valeur_part', *NET_FIELDS], rows)
+    j = ledger.investor_index(investor)
+    valeur_part, capital = ledger.matrices['valeur_part'][:, j], ledger.matrices['capital'][:, j]
+    df_investor = ledger.investor_frame(investor, ['capital', 'valeur_part'], rows)
+    net = fees_and_taxes(valeur_part, capital, ledger.calendar, model, rows)
+    for field, values in net.items():
+        df_investor[field] = values
+    return df_investor
+
+
+def fee_scenarios(ledger, investor, models, rows=None):
+    """
+    Valeur nette d'un investisseur sous plusieurs barèmes, évalués en une
+    passe : {champ: matrice lignes x scénarios}.
+    """
+    j = ledger.investor_index(investor)
+    net = fees_and_taxes(ledger.matrices['valeur_part'][:, j], ledger.matrices['capital'][:, j], ledger.calendar, models, rows)
+    return {field: values.T for field, values in net.items()}
@@ -0,0 +1,128 @@
+# dashboard/ingestion.py
+"""
+Lecture concurrente des fichiers d'entrée indépendants.
+
+Chaque fichier déjà présent dans le cache Parquet est relu directement ;
+les autres sont analysés (openpyxl, CSV) dans un pool de processus :
+l'analyse d'un classeur est du calcul Python pur qui garde le GIL, des
+threads ne la paralléliseraient pas. Une erreur de lecture n'interrompt
+pas les autres fichiers : elle est rangée avec le fichier concerné.
+"""
+import concurrent.futures
+import dataclasses
+import logging
+import multiprocessing
+import os
+import time
+
+import pandas as pd
+
+from dashboard import profiling
+from dashboard.loaders import load_cached, load_timings, parse_and_cache
+
+logger = logging.getLogger(__name__)
+
+# Variable d'environnement fixant le nombre de processus (1 : lecture séquentielle)
+ENV_VAR = 'DASHBOARD_WORKERS'
+# En dessous de ce volume à analyser, le démarrage du pool coûte plus qu'il ne rapporte
+PARALLEL_MIN_BYTES = 256 * 1024
+
+
+@dataclasses.dataclass(frozen=True)
+class FileJob:
+    """
+    Un fichier à lire : `reader(path, **read_kwargs)`, mis en cache sous
+    `.cache/<kind>`.
+    """
+    path: str
+    reader: object = pd.read_excel
+    kind: str = 'excel'
+    read_kwargs: dict = dataclasses.field(default_factory=dict)
+
+
+@dataclasses.dataclass
+class Ingestion:
+    """Tables lues et erreurs de lecture, par clé de fichier."""
+    tables: dict
+    errors: dict
+
+    def table(self, key):
+        """Table du fichier `key` ; relève l'erreur de lecture de ce fichier s'il y en a eu une."""
+        if key in self.errors:
+            raise self.errors[key]
+        return self.tables[key]
+
+
+def default_workers():
+    """Nombre de processus : DASHBOARD_WORKERS, sinon le nombre de cœurs."""
+    value = os.environ.get(ENV_VAR, '')
+    return int(value) if value.isdigit() and int(value) > 0 else os.cpu_count() or 1
+
+
+def ingest(jobs, max_workers=None):
+    """
+    Lit les fichiers `jobs` ({clé: FileJob}) et retourne une `Ingestion`.
+
+    Les fichiers à analyser sont répartis sur `max_workers` processus
+    (par défaut `default_workers()`) ; avec un seul fichier à analyser ou
+    un seul processus, ou moins de PARALLEL_MIN_BYTES à analyser, la lecture
+    se fait dans le processus courant.
+    """
+    tables, errors, pending = {}, {}, {}
+    for key, job in jobs.items():
+        started = time.perf_counter()
+        try:
+            df = load_cached(job.path, job.kind, **job.read_kwargs)
+        except OSError as e:
+            errors[key] = e
+            continue
+        profiling.count(f'parquet_{job.kind}', df is not None)
+        if df is None:
+            pending[key] = job
+        else:
+            tables[key] = df
+            load_timings[job.path] = ('cache', time.perf_counter() - started)
+
+    workers = min(len(pending), max_workers or default_workers())
+    pending_bytes = sum(os.path.getsize(job.path) for job in pending.values())
+    if workers > 1 and pending_bytes >= PARALLEL_MIN_BYTES:
+        with profiling.stage('analyse_parallele'):
+            # spawn : les processus ne copient pas l'état (threads, verrous) du serveur Streamlit
+            with concurrent.futures.ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+                futures = {key: pool.submit(_parse, job) for key, job in pending.items()}
+                outcomes = {key: _outcome(future) for key, future in futures.items()}
+    else:
+        outcomes = {key: _outcome_inline(job) for key, job in pending.items()}
+
+    for key, (df, seconds, error) in outcomes.items():
+        if error is not None:
+            logger.warning("Lecture impossible de %s : %s", jobs[key].path, error)
+            errors[key] = error
+        else:
+            tables[key] = df
+            load_timings[jobs[key].path] = (jobs[key].kind, seconds)
+    return Ingestion(tables, errors)
+
+
+def _parse(job):
+    """Exécuté dans un processus du pool : analyse et mise en cache d'un fichier."""
+    started = time.perf_counter()
+    df = parse_and_cache(job.path, job.reader, job.kind, **job.read_kwargs)
+    return df, time.perf_counter() - started
+
+
+def _outcome(future):
+    # Toute erreur d'un fichier (format, contenu, processus interrompu) reste attachée à ce fichier
+    try:
+        df, seconds = future.result()
+    except Exception as e:
+        return None, None, e
+    return df, seconds, None
+
+
+def _outcome_inline(job):
+    try:
+        df, seconds = _parse(job)
+    except Exception as e:
+        return None, None, e
+    return df, seconds, None
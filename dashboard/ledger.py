@@ -0,0 +1,118 @@
+# dashboard/ledger.py
+import dataclasses
+import functools
+
+import numpy as np
+import pandas as pd
+
+
+@dataclasses.dataclass(frozen=True)
+class InvestorLedger:
+    """
+    Résultats par investisseur sous forme de matrices jours x investisseurs.
+
+    `matrices` associe un nom de grandeur ('capital', 'units', 'valeur_part',
+    'valeur_part_nette'...) à sa matrice ; les grandeurs globales (NAV,
+    nombre total de parts, valeur du portefeuille) sont des vecteurs par jour.
+    `fee_model` : barème (`FeeModel`) des grandeurs nettes déjà présentes
+    dans `matrices`, None si elles n'ont pas été calculées.
+    """
+    dates: pd.DatetimeIndex
+    investors: list
+    matrices: dict
+    nav: np.ndarray
+    total_units: np.ndarray
+    portfolio_value: np.ndarray
+    fingerprint: str = ''
+    fee_model: object = None
+
+    @property
+    def cache_key(self):
+        """Clé de mémoïsation : contenu des fichiers sources et dernier jour calculé."""
+        return f"{self.fingerprint}:{self.dates[-1]:%Y-%m-%d}"
+
+    @functools.cached_property
+    def calendar(self):
+        """
+        Par période de cristallisation ('Y', 'Q', 'M') : (ligne de début de
+        période pour chaque jour, fraction d'année écoulée depuis le début de
+        la période, fraction de la période écoulée), calculés une seule fois
+        par registre.
+        """
+        days_in_year = np.where(self.dates.is_leap_year, 366, 365)
+        calendar = {}
+        for freq in ('Y', 'Q', 'M'):
+            periods = self.dates.to_period(freq)
+            codes = periods.asi8
+            is_period_start = np.r_[True, codes[1:] != codes[:-1]]
+            period_start_rows = np.flatnonzero(is_period_start)[np.cumsum(is_period_start) - 1]
+            elapsed_days = (self.dates - periods.start_time).days.to_numpy() + 1
+            period_days = (periods.end_time - periods.start_time).days.to_numpy() + 1
+            calendar[freq] = period_start_rows, elapsed_days / days_in_year, elapsed_days / period_days
+        return calendar
+
+    def investor_index(self, investor):
+        return self.investors.index(investor)
+
+    def with_matrices(self, **matrices):
+        """Copie du registre enrichie de nouvelles grandeurs (les matrices existantes sont partagées)."""
+        return dataclasses.replace(self, matrices={**self.matrices, **matrices})
+
+    def investor_frame(self, investor, fields=None, rows=None):
+        """
+        Vue d'un seul investisseur : une colonne par grandeur, sans
+        matérialiser les colonnes des autres investisseurs.
+        `rows` restreint la vue à certaines lignes (voir `window_rows`).
+        """
+        j = self.investor_index(investor)
+        fields = fields or list(self.matrices)
+        if rows is None:
+            rows = slice(None)
+        columns = {'Date': self.dates[rows]}
+        for field in fields:
+            columns[field] = self.matrices[field][rows, j]
+        return pd.DataFrame(columns)
+
+    def last_day(self, investor):
+        """Valeurs du dernier jour pour un investisseur."""
+        j = self.investor_index(investor)
+        return {field: matrix[-1, j] for field, matrix in self.matrices.items()}
+
+
+# Résolutions proposées : clé pandas de période
+RESOLUTIONS = {'Quotidienne': 'D', 'Hebdomadaire': 'W', 'Mensuelle': 'M'}
+
+
+def window_rows(dates, start=None, end=None, freq='D'):
+    """
+    Indices des lignes d'une fenêtre de dates (bornes incluses) à la
+    résolution demandée : pour 'W'/'M' on garde le dernier jour de chaque
+    période, les grandeurs suivies étant des niveaux (valeurs, cumuls).
+    """
+    dates = pd.DatetimeIndex(dates)
+    first = 0 if start is None else dates.searchsorted(pd.Timestamp(start), side='left')
+    last = len(dates) if end is None else dates.searchsorted(pd.Timestamp(end), side='right')
+    rows = np.arange(first, last)
+    if freq == 'D' or len(rows) == 0:
+        return rows
+    periods = dates[first:last].to_period(freq).asi8
+    return rows[np.r_[periods[1:] != periods[:-1], True]]
+
+
+def build_ledger(dates, portfolio_value, inflows, investors, nav_result, fingerprint=''):
+    """Assemble le registre à partir de la matrice des apports et du résultat du moteur NAV."""
+    units, total_units, nav = nav_result
+    return InvestorLedger(
+        dates=pd.DatetimeIndex(dates),
+        investors=list(investors),
+        matrices={
+            'apports': inflows,
+            'capital': np.cumsum(inflows, axis=0),
+            'units': units,
+            'valeur_part': units * nav[:, None],
+        },
+        nav=nav,
+        total_units=total_units,
+        portfolio_value=np.asarray(portfolio_value, dtype=float),
+        fingerprint=fingerprint,
+    )
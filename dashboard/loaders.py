@@ -0,0 +1,126 @@
+# dashboard/loaders.py
+import hashlib
+import json
+import logging
+import os
+import time
+
+import pandas as pd
+
+from dashboard import profiling
+from dashboard.cache import cache_path, file_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# Dernier mode de chargement et durée par fichier source : {chemin: (mode, secondes)}
+load_timings = {}
+
+
+def _cache_files(path, read_kwargs, kind='excel'):
+    """
+    Chemins du cache Parquet et de ses métadonnées pour un fichier et ses
+    options de lecture. Le chemin complet entre dans la clé : deux
+    portefeuilles aux fichiers de même nom ne partagent pas d'entrée.
+    """
+    key = json.dumps([os.path.abspath(path), read_kwargs], sort_keys=True, default=str)
+    options = hashlib.sha256(key.encode()).hexdigest()[:12]
+    base = cache_path(kind, f"{os.path.basename(path)}-{options}")
+    return base + '.parquet', base + '.json'
+
+
+def _read_meta(meta_file):
+    try:
+        with open(meta_file, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(meta_file, meta):
+    with open(meta_file, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+
+def read_excel_cached(path, **read_kwargs):
+    """
+    `pd.read_excel` avec un cache colonne (Parquet) dans `.cache/excel`.
+
+    Le classeur n'est relu par openpyxl que si son mtime/sa taille ont
+    changé ET que son contenu (SHA-256) diffère de celui mis en cache.
+    """
+    return read_cached(path, pd.read_excel, 'excel', **read_kwargs)
+
+
+def read_cached(path, reader, kind, **read_kwargs):
+    """
+    Lecture d'un fichier source par `reader(path, **read_kwargs)` avec un
+    cache Parquet typé dans `.cache/<kind>`, invalidé par mtime puis hash.
+    """
+    started = time.perf_counter()
+    df = load_cached(path, kind, **read_kwargs)
+    profiling.count(f'parquet_{kind}', df is not None)
+    if df is not None:
+        _record(path, 'cache', started)
+        return df
+    df = parse_and_cache(path, reader, kind, **read_kwargs)
+    _record(path, kind, started)
+    return df
+
+
+def load_cached(path, kind, **read_kwargs):
+    """Table en cache Parquet si le fichier n'a pas changé depuis, sinon None."""
+    if not is_cached(path, kind, **read_kwargs):
+        return None
+    return pd.read_parquet(_cache_files(path, read_kwargs, kind)[0])
+
+
+def is_cached(path, kind, **read_kwargs):
+    """Le cache Parquet du fichier est-il à jour (mtime/taille, puis contenu) ?"""
+    parquet_file, meta_file = _cache_files(path, read_kwargs, kind)
+    stat = os.stat(path)
+    meta = _read_meta(meta_file)
+    if meta is None or not os.path.exists(parquet_file):
+        return False
+    if meta['mtime'] == stat.st_mtime and meta['size'] == stat.st_size:
+        return True
+    if meta['sha256'] == file_fingerprint(path):
+        # Fichier touché (checkout, copie) mais contenu identique
+        meta.update(mtime=stat.st_mtime, size=stat.st_size)
+        _write_meta(meta_file, meta)
+        return True
+    return False
+
+
+def parse_and_cache(path, reader, kind, **read_kwargs):
+    """Lit le fichier source par `reader` et écrit son cache Parquet."""
+    parquet_file, meta_file = _cache_files(path, read_kwargs, kind)
+    stat = os.stat(path)
+    df = reader(path, **read_kwargs)
+    try:
+        df.to_parquet(parquet_file, index=False)
+        _write_meta(meta_file, {'mtime': stat.st_mtime, 'size': stat.st_size, 'sha256': file_fingerprint(path)})
+    except (ValueError, TypeError, ImportError) as e:
+        # Colonnes non typables en Arrow ou pyarrow absent : on continue sans cache
+        logger.warning("Cache Parquet impossible pour %s : %s", path, e)
+    return df
+
+
+def _record(path, mode, started):
+    elapsed = time.perf_counter() - started
+    load_timings[path] = (mode, elapsed)
+    logger.info("%s chargé depuis %s en %.1f ms", path, mode, elapsed * 1000)
+
+
+if __name__ == '__main__':
+    # Rapport démarrage à froid / à chaud : python -m dashboard.loaders [fichiers...]
+    import sys
+    files = sys.argv[1:] or ['data/apports_investisseurs.xlsx', 'data/performance_pea.xlsx']
+    for path in files:
+        for cached_file in _cache_files(path, {}):
+            if os.path.exists(cached_file):
+                os.remove(cached_file)
+        read_excel_cached(path)
+        cold = load_timings[path][1]
+        read_excel_cached(path)
+        warm = load_timings[path][1]
+        print(f"{path} : froid {cold * 1000:.1f} ms, chaud {warm * 1000:.1f} ms (x{cold / warm:.0f})")
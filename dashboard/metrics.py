@@ -0,0 +1,163 @@
+# dashboard/metrics.py
+"""
+Indicateurs de performance de tous les investisseurs à la fois.
+
+Tous les investisseurs partagent la même valeur de part (NAV) : rendement
+pondéré par le temps, drawdown et volatilité ne diffèrent que par la date
+d'entrée, et sont calculés sur des matrices jours x investisseurs masquées
+avant l'entrée. Le TRI (pondéré par les montants) dépend des apports de
+chacun et est résolu par une méthode de Newton sur toutes les colonnes en
+même temps.
+"""
+import numpy as np
+import pandas as pd
+
+from dashboard.fees import fees_and_taxes
+
+DAYS_PER_YEAR = 365
+ROLLING_WINDOW = 365
+
+
+def entry_rows(apports):
+    """Ligne du premier apport de chaque investisseur (-1 s'il n'a rien apporté)."""
+    has_flow = apports != 0
+    return np.where(has_flow.any(axis=0), has_flow.argmax(axis=0), -1)
+
+
+def _extended_nav(nav):
+    """NAV précédé du NAV initial (1) : l'indice s correspond à la veille du jour s."""
+    return np.r_[1.0, np.asarray(nav, dtype=float)]
+
+
+def time_weighted_returns(nav, entries):
+    """
+    Rendement pondéré par le temps depuis l'entrée : les parts étant émises
+    au NAV de la veille, c'est NAV final / NAV de la veille du premier apport.
+    """
+    nav_ext = _extended_nav(nav)
+    returns = nav_ext[-1] / nav_ext[np.maximum(entries, 0)] - 1
+    return np.where(entries >= 0, returns, np.nan)
+
+
+def annualize(returns, days):
+    """Rendement annualisé sur `days` jours calendaires."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(days > 0, (1 + returns) ** (DAYS_PER_YEAR / days) - 1, np.nan)
+
+
+def max_drawdowns(nav, entries):
+    """Plus forte baisse du NAV depuis un plus haut, sur la période de détention de chacun."""
+    nav_ext = _extended_nav(nav)
+    rows = np.arange(len(nav_ext))[:, None]
+    held = np.where((rows >= entries) & (entries >= 0), nav_ext[:, None], np.nan)
+    running_max = np.fmax.accumulate(held, axis=0)
+    with np.errstate(invalid='ignore', all='ignore'):
+        drawdowns = np.nanmin(held / running_max - 1, axis=0, initial=0.0)
+    return np.where(entries >= 0, drawdowns, np.nan)
+
+
+def _log_returns(nav):
+    nav_ext = _extended_nav(nav)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_returns = np.log(nav_ext[1:] / nav_ext[:-1])
+    return np.where(np.isfinite(log_returns), log_returns, 0.0)
+
+
+def volatilities(nav, entries):
+    """
+    Volatilité annualisée des rendements journaliers du NAV depuis l'entrée,
+    par sommes cumulées des rendements et de leurs carrés (pas de boucle).
+    """
+    log_returns = _log_returns(nav)
+    sums = np.r_[0.0, np.cumsum(log_returns)]
+    squares = np.r_[0.0, np.cumsum(log_returns ** 2)]
+    start = np.maximum(entries, 0)
+    count = len(log_returns) - start
+    total, total_sq = sums[-1] - sums[start], squares[-1] - squares[start]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variance = (total_sq - total ** 2 / count) / (count - 1)
+    volatility = np.sqrt(np.clip(variance, 0, None) * DAYS_PER_YEAR)
+    return np.where((entries >= 0) & (count > 1), volatility, np.nan)
+
+
+def rolling_volatility(nav, window=ROLLING_WINDOW):
+    """Volatilité annualisée glissante du NAV sur `window` jours (NaN avant la première fenêtre)."""
+    log_returns = _log_returns(nav)
+    sums = np.r_[0.0, np.cumsum(log_returns)]
+    squares = np.r_[0.0, np.cumsum(log_returns ** 2)]
+    result = np.full(len(log_returns), np.nan)
+    if len(log_returns) >= window > 1:
+        total = sums[window:] - sums[:-window]
+        total_sq = squares[window:] - squares[:-window]
+        variance = (total_sq - total ** 2 / window) / (window - 1)
+        result[window - 1:] = np.sqrt(np.clip(variance, 0, None) * DAYS_PER_YEAR)
+    return result
+
+
+def money_weighted_irr(dates, apports, terminal_values, tol=1e-10, max_iter=100):
+    """
+    TRI annuel de chaque investisseur : taux r tel que la valeur finale égale
+    les apports capitalisés, V = somme des a_k (1 + r)^(durée_k en années).
+
+    Newton est appliqué à toutes les colonnes à la fois sur la matrice
+    (jours d'apport x investisseurs), à partir de l'approximation de Dietz.
+    NaN si l'investisseur n'a rien apporté ou si le calcul ne converge pas.
+    """
+    dates = pd.DatetimeIndex(dates)
+    apports = np.asarray(apports, dtype=float)
+    terminal_values = np.asarray(terminal_values, dtype=float)
+    flow_rows = np.flatnonzero((apports != 0).any(axis=1))
+    flows = apports[flow_rows]
+    years = ((dates[-1] - dates[flow_rows]).days.to_numpy() / DAYS_PER_YEAR)[:, None]
+
+    weighted = (flows * years).sum(axis=0)
+    active = (flows.sum(axis=0) > 0) & (weighted > 0) & np.isfinite(terminal_values)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = np.where(active, (terminal_values - flows.sum(axis=0)) / weighted, 0.0)
+    rate = np.clip(rate, -0.9, 10.0)
+    converged = ~active
+    for _ in range(max_iter):
+        growth = np.exp(years * np.log1p(rate))
+        residual = terminal_values - (flows * growth).sum(axis=0)
+        slope = -(flows * years * growth).sum(axis=0) / (1 + rate)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = np.where(active & (slope != 0), residual / slope, 0.0)
+        rate = np.where(active, np.maximum(rate - step, -0.9999), rate)
+        converged = ~active | (np.abs(step) < tol)
+        if converged.all():
+            break
+    return np.where(active & converged, rate, np.nan)
+
+
+def investor_metrics(ledger, model=None):
+    """
+    Table des indicateurs par investisseur (une ligne chacun) : capital,
+    valeur brute, TWR et TWR annualisé, TRI brut, TRI net sous le barème
+    `model` (par défaut celui du registre, s'il en porte un), drawdown
+    maximal et volatilité annualisée.
+    """
+    apports = ledger.matrices['apports']
+    entries = entry_rows(apports)
+    days_held = np.where(entries >= 0, len(ledger.dates) - entries, 0)
+    twr = time_weighted_returns(ledger.nav, entries)
+    metrics = {
+        'capital': ledger.matrices['capital'][-1],
+        'valeur_part': ledger.matrices['valeur_part'][-1],
+        'twr': twr,
+        'twr_annualise': annualize(twr, days_held),
+        'tri_brut': money_weighted_irr(ledger.dates, apports, ledger.matrices['valeur_part'][-1]),
+    }
+    model = model or ledger.fee_model
+    if model is not None:
+        if ledger.fee_model == model:
+            net_values = ledger.matrices['valeur_part_nette'][-1]
+        else:
+            # Barème différent de celui du registre : valeur nette du dernier jour seulement
+            last_day = slice(len(ledger.dates) - 1, None)
+            net_values = fees_and_taxes(
+                ledger.matrices['valeur_part'], ledger.matrices['capital'], ledger.calendar, model, last_day
+            )['valeur_part_nette'][-1]
+        metrics['tri_net'] = money_weighted_irr(ledger.dates, apports, net_values)
+    metrics['drawdown_max'] = max_drawdowns(ledger.nav, entries)
+    metrics['volatilite'] = volatilities(ledger.nav, entries)
+    return pd.DataFrame(metrics, index=pd.Index(ledger.investors, name='investisseur'))
@@ -0,0 +1,58 @@
+# dashboard/nav.py
+import numpy as np
+
+
+def compute_units(inflows, portfolio_value, units_start=None, nav_start=1.0):
+    """
+    Comptabilité en parts (NAV) vectorisée.
+
+    `inflows` est une matrice jours x investisseurs des apports du jour,
+    `portfolio_value` la valeur globale du portefeuille chaque jour.
+    Les nouvelles parts sont émises au NAV de la veille ; entre deux jours
+    d'apport le nombre de parts est constant, on ne boucle donc que sur les
+    jours d'apport et le reste est calculé par cumsum et division.
+
+    `units_start` / `nav_start` permettent de reprendre le calcul à partir
+    de l'état de la veille du premier jour.
+
+    Retourne (units, total_units, nav).
+    """
+    inflows = np.asarray(inflows, dtype=float)
+    portfolio_value = np.asarray(portfolio_value, dtype=float)
+    n_days, n_investors = inflows.shape
+    if units_start is None:
+        units_start = np.zeros(n_investors)
+    units_start = np.asarray(units_start, dtype=float)
+
+    # --- Jours d'apport : seuls points où le nombre de parts change ---
+    flow_days = np.flatnonzero((inflows != 0).any(axis=1))
+    new_units = np.zeros_like(inflows)
+    nav = np.empty(n_days)
+
+    units_current = units_start.sum()
+    nav_yesterday = nav_start
+    segment_start = 0
+    for day in flow_days:
+        # NAV des jours précédant cet apport (parts constantes sur le segment)
+        if day > segment_start:
+            nav[segment_start:day] = _segment_nav(portfolio_value[segment_start:day], units_current, nav_yesterday)
+            nav_yesterday = nav[day - 1]
+        if nav_yesterday > 0:
+            new_units[day] = inflows[day] / nav_yesterday
+        else:
+            new_units[day] = inflows[day]
+        units_current += new_units[day].sum()
+        segment_start = day
+    nav[segment_start:] = _segment_nav(portfolio_value[segment_start:], units_current, nav_yesterday)
+
+    units = units_start + np.cumsum(new_units, axis=0)
+    total_units = units.sum(axis=1)
+    return units, total_units, nav
+
+
+def _segment_nav(values, total_units, nav_yesterday):
+    """NAV d'un segment à nombre de parts constant."""
+    if total_units > 0:
+        return values / total_units
+    return np.full(len(values), nav_yesterday)
+
@@ -0,0 +1,96 @@
+# dashboard/nav_state.py
+import os
+
+import numpy as np
+
+from dashboard.cache import cache_path
+from dashboard.nav import compute_units
+
+STATE_FILE = 'nav_state.npz'
+
+
+def load_snapshot(path=None):
+    """Charge le dernier état NAV persisté, ou None s'il est absent/illisible."""
+    path = path or cache_path(STATE_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            return {key: data[key] for key in data.files}
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def save_snapshot(snapshot, path=None):
+    """Écrit l'état NAV de façon atomique (fichier temporaire puis remplacement)."""
+    path = path or cache_path(STATE_FILE)
+    tmp_path = path + '.tmp.npz'
+    np.savez(tmp_path, **snapshot)
+    os.replace(tmp_path, path)
+
+
+def first_changed_day(snapshot, dates, inflows, portfolio_value, investors):
+    """
+    Premier jour (indice dans `dates`) dont les entrées diffèrent de l'état
+    persisté. Retourne 0 si l'état n'est pas réutilisable.
+    """
+    old_dates = snapshot['dates']
+    if len(old_dates) == 0 or old_dates[0] != dates[0]:
+        return 0
+    old_investors = snapshot['investors'].tolist()
+    if not set(old_investors) <= set(investors):
+        return 0
+
+    # Réaligne les colonnes persistées sur la liste actuelle des investisseurs
+    n = min(len(old_dates), len(dates))
+    old_inflows = np.zeros((n, len(investors)))
+    positions = [investors.index(name) for name in old_investors]
+    old_inflows[:, positions] = snapshot['inflows'][:n]
+
+    changed = (old_inflows != inflows[:n]).any(axis=1)
+    changed |= snapshot['portfolio_value'][:n] != portfolio_value[:n]
+    changed |= old_dates[:n] != dates[:n]
+    changed_days = np.flatnonzero(changed)
+    return int(changed_days[0]) if len(changed_days) else n
+
+
+def resume_units(dates, inflows, portfolio_value, investors, fingerprint, path=None):
+    """
+    Calcul NAV incrémental : reprend à partir du dernier jour valide de
+    l'état persisté au lieu de rejouer tout l'historique.
+
+    Une modification d'une ligne passée n'invalide que les jours à partir
+    de sa date. Retourne (units, total_units, nav).
+    """
+    dates = np.asarray(dates, dtype='datetime64[ns]')
+    inflows = np.asarray(inflows, dtype=float)
+    portfolio_value = np.asarray(portfolio_value, dtype=float)
+    snapshot = load_snapshot(path)
+
+    start = 0
+    if snapshot is not None:
+        if str(snapshot['fingerprint']) == fingerprint and np.array_equal(snapshot['dates'], dates) \
+                and snapshot['investors'].tolist() == investors:
+            return snapshot['units'], snapshot['total_units'], snapshot['nav']
+        start = first_changed_day(snapshot, dates, inflows, portfolio_value, investors)
+
+    if start > 0:
+        old_units = np.zeros((start, len(investors)))
+        positions = [investors.index(name) for name in snapshot['investors'].tolist()]
+        old_units[:, positions] = snapshot['units'][:start]
+        new_units, _, new_nav = compute_units(
+            inflows[start:], portfolio_value[start:],
+            units_start=old_units[-1], nav_start=snapshot['nav'][start - 1]
+        )
+        units = np.vstack([old_units, new_units])
+        nav = np.concatenate([snapshot['nav'][:start], new_nav])
+        total_units = units.sum(axis=1)
+    else:
+        units, total_units, nav = compute_units(inflows, portfolio_value)
+
+    save_snapshot({
+        'fingerprint': np.array(fingerprint), 'dates': dates, 'investors': np.array(investors, dtype=str),
+        'inflows': inflows, 'portfolio_value': portfolio_value,
+        'units': units, 'total_units': total_units, 'nav': nav,
+    }, path)
+    return units, total_units, nav
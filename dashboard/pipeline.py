@@ -0,0 +1,117 @@
+# dashboard/pipeline.py
+import os
+
+import numpy as np
+import pandas as pd
+
+from dashboard import profiling
+from dashboard.artifacts import export_artifacts, exported_fee_model, load_artifacts
+from dashboard.cache import file_fingerprint
+from dashboard.fees import DEFAULT_MODEL, apply_fees_and_taxes
+from dashboard.inflows import inflow_matrices
+from dashboard.ingestion import FileJob, Ingestion, ingest
+from dashboard.ledger import build_ledger
+from dashboard.nav_state import resume_units
+from dashboard.schema import APPORTS, SOURCES, VALUE_SERIES, read_table
+from dashboard.sources import default_spec, parse_source_specs, source_values, valuation_files
+
+
+def load_and_process_all_data(portfolio):
+    """
+    Calcul complet d'un portefeuille, sans dépendance à Streamlit.
+    Retourne (registre, apports, valeurs quotidiennes par source) ;
+    lève FileNotFoundError si un fichier d'entrée manque et SchemaError
+    s'il n'est pas conforme à son schéma.
+    """
+    apports_file = portfolio.apports_file
+    jobs = input_jobs(portfolio)
+    with profiling.stage('lecture_fichiers'):
+        ingestion = ingest(jobs)
+    with profiling.stage('lecture_apports'):
+        df_apports = ingestion.table('apports')
+    profiling.record_frame('apports', df_apports)
+    investors = df_apports['NomInvestisseur'].unique().tolist()
+    with profiling.stage('lecture_sources'):
+        # Table déjà lue (ou erreur de lecture relevée telle quelle, sans nouvelle analyse)
+        source_specs = parse_source_specs(ingestion.table('sources'), portfolio.pea_perf_file, portfolio.data_dir) if 'sources' in jobs else {}
+
+    start_date = df_apports['Date'].min(); end_date = pd.to_datetime('today')
+    date_range = pd.date_range(start_date, end_date, freq='D')
+    sources = df_apports['SourcePlacement'].unique().tolist()
+    # Sources déclarées avec leur propre série de valeurs, même sans apport
+    sources += [name for name, spec in source_specs.items() if name not in sources and spec.method == 'serie']
+    specs = [source_specs.get(source) or default_spec(source, portfolio.pea_perf_file) for source in sources]
+    if 'PEA' not in sources:
+        specs.append(default_spec('PEA', portfolio.pea_perf_file))
+    # Classeurs de valeurs propres à certaines sources, connus après lecture des sources
+    series_tables = {portfolio.pea_perf_file: 'pea'} if 'pea' in jobs else {}
+    extra_files = [path for path in valuation_files(specs) if path not in series_tables]
+    if extra_files:
+        with profiling.stage('lecture_valorisations'):
+            extra = ingest({path: FileJob(path, read_table, read_kwargs={'schema': VALUE_SERIES}) for path in extra_files})
+        ingestion = Ingestion({**ingestion.tables, **extra.tables}, {**ingestion.errors, **extra.errors})
+        series_tables.update((path, path) for path in extra_files)
+    with profiling.stage('matrices_apports'):
+        inflows, source_inflows = inflow_matrices(df_apports, date_range, investors, sources)
+
+    # Valeur quotidienne de chaque source (mise en cache source par source)
+    with profiling.stage('valeurs_sources'):
+        values = {
+            spec.name: source_values(
+                spec, date_range, source_inflows[:, j] if j < len(sources) else np.zeros(len(date_range)),
+                ingestion.table(series_tables[spec.value_file]) if spec.method == 'serie' else None,
+            )
+            for j, spec in enumerate(specs)
+        }
+    columns = sorted(values, key=lambda name: name.upper() != 'PEA')
+    df_global_value = pd.DataFrame({name: values[name] for name in columns}, index=date_range)
+
+    df_global_value['PortfolioValue_Global'] = df_global_value[sources].sum(axis=1)
+    profiling.record_frame('valeurs', df_global_value)
+    portfolio_value = df_global_value['PortfolioValue_Global'].to_numpy()
+    fingerprint = file_fingerprint(apports_file, *[portfolio.sources_file] * bool(source_specs), *valuation_files(specs))
+    with profiling.stage('nav'):
+        nav_result = resume_units(date_range, inflows, portfolio_value, investors, fingerprint, portfolio.state_file)
+    ledger = build_ledger(date_range, portfolio_value, inflows, investors, nav_result, fingerprint)
+    profiling.record_frame('parts', ledger.matrices['units'])
+    return ledger, df_apports, df_global_value
+
+
+def input_jobs(portfolio):
+    """
+    Fichiers d'entrée indépendants lus ensemble en début de calcul : apports,
+    sources et série du PEA. Les relevés de positions n'interviennent pas
+    dans la NAV : ils sont lus par `PositionsStore.load_all` dans l'onglet
+    d'analyse.
+    """
+    jobs = {'apports': FileJob(portfolio.apports_file, read_table, read_kwargs={'schema': APPORTS})}
+    if os.path.exists(portfolio.sources_file):
+        jobs['sources'] = FileJob(portfolio.sources_file, read_table, read_kwargs={'schema': SOURCES})
+    if os.path.exists(portfolio.pea_perf_file):
+        jobs['pea'] = FileJob(portfolio.pea_perf_file, read_table, read_kwargs={'schema': VALUE_SERIES})
+    return jobs
+
+
+def compute_and_export(portfolio, model=DEFAULT_MODEL):
+    """Calcul complet, frais et impôt latent compris, puis écriture des artefacts."""
+    ledger, df_apports, df_global_value = load_and_process_all_data(portfolio)
+    with profiling.stage('frais_impots'):
+        ledger = apply_fees_and_taxes(ledger, model)
+    with profiling.stage('export_artefacts'):
+        export_artifacts(portfolio, ledger, df_apports, df_global_value)
+    return ledger, df_apports, df_global_value
+
+
+def load_portfolio_state(portfolio):
+    """
+    État d'un portefeuille lu dans ses artefacts précalculés (projetés en
+    mémoire), ou recalculé et réexporté s'ils sont absents ou périmés. Le
+    recalcul garde le barème du dernier export (choisi par `python -m
+    dashboard compute`), le barème par défaut n'étant pris qu'à défaut.
+    """
+    with profiling.stage('lecture_artefacts'):
+        state = load_artifacts(portfolio)
+    profiling.count('artefacts', state is not None)
+    if state is not None:
+        return state
+    return compute_and_export(portfolio, exported_fee_model(portfolio) or DEFAULT_MODEL)
@@ -0,0 +1,188 @@
+# dashboard/portfolios.py
+import collections
+import dataclasses
+import functools
+import json
+import os
+import re
+import threading
+
+from dashboard import profiling
+from dashboard.cache import cache_path
+
+REGISTRY_FILE = 'portefeuilles.json'
+DEFAULT_PORTFOLIO = 'Portefeuille principal'
+# Plafond mémoire des états calculés, tous portefeuilles confondus
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+@dataclasses.dataclass(frozen=True)
+class Portfolio:
+    """
+    Un portefeuille et son dossier de données, organisé comme `data/` :
+    apports_investisseurs.xlsx, performance_pea.xlsx, sources_placement.xlsx
+    et Positions/.
+    """
+    name: str
+    data_dir: str = 'data'
+
+    @property
+    def apports_file(self):
+        return os.path.join(self.data_dir, 'apports_investisseurs.xlsx')
+
+    @property
+    def pea_perf_file(self):
+        return os.path.join(self.data_dir, 'performance_pea.xlsx')
+
+    @property
+    def sources_file(self):
+        return os.path.join(self.data_dir, 'sources_placement.xlsx')
+
+    @property
+    def positions_dir(self):
+        return os.path.join(self.data_dir, 'Positions')
+
+    @property
+    def slug(self):
+        """Nom de dossier de cache propre au portefeuille."""
+        return re.sub(r'[^A-Za-z0-9_-]+', '_', self.name).strip('_') or 'portefeuille'
+
+    @property
+    def state_file(self):
+        """Snapshot des parts (NAV) du portefeuille, dans son propre dossier de cache."""
+        from dashboard.nav_state import STATE_FILE
+        return cache_path(self.slug, STATE_FILE)
+
+    def input_files(self):
+        """
+        Tous les fichiers d'entrée du calcul de la NAV : apports, sources,
+        série du PEA et classeurs `FichierValorisation` déclarés par les
+        sources. Les relevés de positions n'en font pas partie : l'onglet
+        d'analyse suit leurs changements par `snapshot_signature`.
+        """
+        paths = [self.apports_file, self.pea_perf_file, self.sources_file]
+        try:
+            stat = os.stat(self.sources_file)
+        except OSError:
+            return paths
+        declared = _declared_value_files(self.sources_file, self.pea_perf_file, self.data_dir, stat.st_mtime, stat.st_size)
+        return paths + [path for path in declared if path not in paths]
+
+    def input_signature(self):
+        """
+        (chemin, date de modification, taille) de chaque fichier d'entrée :
+        change dès qu'un fichier est modifié, ajouté ou retiré.
+        """
+        signature = []
+        for path in self.input_files():
+            try:
+                stat = os.stat(path)
+                signature.append((path, stat.st_mtime, stat.st_size))
+            except OSError:
+                signature.append((path, None, None))
+        return tuple(signature)
+
+
+@functools.lru_cache(maxsize=16)
+def _declared_value_files(sources_file, pea_perf_file, data_dir, mtime, size):
+    """Classeurs de valeurs déclarés par le fichier des sources, relus quand il change."""
+    # Import différé : ce module est chargé avant le premier affichage
+    from dashboard.sources import read_source_specs, valuation_files
+
+    return tuple(valuation_files(read_source_specs(sources_file, pea_perf_file, data_dir).values()))
+
+
+def load_registry(path=REGISTRY_FILE):
+    """
+    Portefeuilles servis par l'application, par nom. Le registre est un JSON
+    `[{"nom": ..., "dossier": ...}, ...]` ; sans registre, seul `data/` est servi.
+    """
+    if not os.path.exists(path):
+        return {DEFAULT_PORTFOLIO: Portfolio(DEFAULT_PORTFOLIO)}
+    with open(path, encoding='utf-8') as f:
+        entries = json.load(f)
+    return {entry['nom']: Portfolio(entry['nom'], entry['dossier']) for entry in entries}
+
+
+def estimate_size(obj):
+    """
+    Taille mémoire approximative (octets) d'un état calculé. Les tableaux
+    projetés depuis les artefacts ne comptent pas : leurs pages restent
+    dans le cache du système, qui peut les libérer.
+    """
+    # Import différé : ce module est chargé avant le premier affichage
+    import numpy as np
+    import pandas as pd
+
+    if isinstance(obj, np.memmap):
+        return 0
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return int(np.sum(obj.memory_usage(deep=True)))
+    if isinstance(obj, pd.Index):
+        return obj.memory_usage(deep=True)
+    if isinstance(obj, dict):
+        return sum(estimate_size(value) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(estimate_size(value) for value in obj)
+    if dataclasses.is_dataclass(obj):
+        return sum(estimate_size(getattr(obj, field.name)) for field in dataclasses.fields(obj))
+    return 64
+
+
+class PortfolioCache:
+    """
+    Cache LRU des états calculés de plusieurs portefeuilles, borné en
+    mémoire : les portefeuilles les moins récemment consultés sont évincés
+    quand le total dépasse `max_bytes` (le plus récent est toujours gardé).
+    Un portefeuille n'est calculé que par une session à la fois : les
+    autres attendent son résultat plutôt que de recalculer (et réexporter)
+    en parallèle.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._compute_locks = collections.defaultdict(threading.Lock)
+
+    def get(self, key, compute):
+        """Valeur associée à `key`, calculée par `compute()` si absente."""
+        value = self._lookup(key)
+        if value is not None:
+            return value[0]
+        with self._lock:
+            compute_lock = self._compute_locks[key[0]]
+        with compute_lock:
+            # Calculée par une autre session pendant l'attente
+            value = self._lookup(key)
+            if value is not None:
+                return value[0]
+            profiling.count('etats_portefeuilles', False)
+            return self._store(key, compute())
+
+    def _lookup(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            profiling.count('etats_portefeuilles', True)
+            return self._entries[key]
+
+    def _store(self, key, value):
+        with self._lock:
+            # Une seule version par portefeuille : les anciennes signatures sont retirées
+            for old_key in [k for k in self._entries if k[0] == key[0]]:
+                del self._entries[old_key]
+            self._entries[key] = (value, estimate_size(value))
+            while len(self._entries) > 1 and self.total_bytes > self.max_bytes:
+                self._entries.popitem(last=False)
+        return value
+
+    @property
+    def total_bytes(self):
+        return sum(size for _, size in self._entries.values())
+
+    def keys(self):
+        return list(self._entries)
@@ -0,0 +1,198 @@
+# dashboard/positions.py
+import os
+import unicodedata
+
+import pandas as pd
+
+from dashboard import profiling
+from dashboard.ingestion import FileJob, ingest
+from dashboard.loaders import read_cached
+from dashboard.schema import POSITIONS, validate
+
+POSITIONS_DIR = 'data/Positions'
+
+MONTHS = {
+    'janvier': 1, 'fevrier': 2, 'mars': 3, 'avril': 4, 'mai': 5, 'juin': 6,
+    'juillet': 7, 'aout': 8, 'septembre': 9, 'octobre': 10, 'novembre': 11, 'decembre': 12,
+}
+
+
+def snapshot_date(path):
+    """
+    Date d'arrêté d'un relevé de positions, lue dans son nom (`Juillet_2025.csv`
+    -> 31/07/2025). Le nom fait foi : les dates de fichier ne sont pas fiables
+    après un checkout git. À défaut, on prend la date de modification.
+    """
+    stem = os.path.splitext(os.path.basename(path))[0]
+    month, _, year = stem.partition('_')
+    month = unicodedata.normalize('NFKD', month).encode('ascii', 'ignore').decode().lower()
+    if month in MONTHS and year.isdigit():
+        return pd.Timestamp(int(year), MONTHS[month], 1) + pd.offsets.MonthEnd(0)
+    return pd.Timestamp(os.path.getmtime(path), unit='s').normalize()
+
+
+def parse_positions_csv(path, schema=POSITIONS):
+    """
+    Relevé de positions (CSV export courtier, format français) validé et
+    typé par `schema` ; SchemaError en cas de colonne ou de ligne invalide.
+    """
+    df = validate(pd.read_csv(path, delimiter=';', encoding='utf-8-sig', decimal=',', thousands=' '), schema, path)
+    df['Valeur'] = df['quantity'].astype(float) * df['lastPrice']
+    return df
+
+
+class PositionsStore:
+    """
+    Index des relevés mensuels de positions par date d'arrêté.
+
+    Chaque fichier n'est lu qu'une fois (cache Parquet typé, puis mémoire) ;
+    le dernier relevé ou n'importe quel relevé historique est obtenu par
+    simple accès au dictionnaire.
+    """
+
+    def __init__(self, directory=POSITIONS_DIR):
+        self.directory = directory
+        self.paths = {}
+        # Relevés illisibles écartés par `load_all` : {chemin: exception}
+        self.errors = {}
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                if name.lower().endswith('.csv'):
+                    path = os.path.join(directory, name)
+                    self.paths[snapshot_date(path)] = path
+        self.paths = dict(sorted(self.paths.items()))
+        self._frames = {}
+
+    @property
+    def as_of_dates(self):
+        return list(self.paths)
+
+    def get(self, as_of):
+        """Relevé à la date d'arrêté `as_of` (DataFrame typé)."""
+        as_of = pd.Timestamp(as_of)
+        if as_of not in self._frames:
+            with profiling.stage('lecture_positions'):
+                self._frames[as_of] = read_cached(self.paths[as_of], parse_positions_csv, 'positions', schema=POSITIONS)
+        return self._frames[as_of]
+
+    def latest(self):
+        """(date d'arrêté, relevé) le plus récent, ou (None, None) si le dossier est vide."""
+        if not self.paths:
+            return None, None
+        as_of = self.as_of_dates[-1]
+        return as_of, self.get(as_of)
+
+    def load_all(self):
+        """
+        Lit tous les relevés en parallèle (par exemple avant mise en cache de
+        l'objet). Un relevé illisible est retiré de l'index et rangé dans
+        `errors` sans empêcher la lecture des autres.
+        """
+        pending = {as_of: path for as_of, path in self.paths.items() if as_of not in self._frames}
+        with profiling.stage('lecture_positions'):
+            ingestion = ingest(snapshot_jobs(pending))
+        self._frames.update(ingestion.tables)
+        for as_of in ingestion.errors:
+            self.errors[self.paths.pop(as_of)] = ingestion.errors[as_of]
+        return self
+
+    def compare(self, previous, current):
+        """Variation ligne à ligne (par ISIN) des quantités et valeurs entre deux relevés."""
+        columns = ['isin', 'name', 'quantity', 'Valeur']
+        merged = self.get(previous)[columns].merge(
+            self.get(current)[columns], on='isin', how='outer', suffixes=('_avant', '_apres')
+        )
+        merged['name'] = merged['name_apres'].fillna(merged['name_avant'])
+        for col in ['quantity', 'Valeur']:
+            merged[f'{col}_avant'] = merged[f'{col}_avant'].fillna(0)
+            merged[f'{col}_apres'] = merged[f'{col}_apres'].fillna(0)
+            merged[f'variation_{col}'] = merged[f'{col}_apres'] - merged[f'{col}_avant']
+        return merged.drop(columns=['name_avant', 'name_apres'])
+
+
+def snapshot_signature(directory=POSITIONS_DIR):
+    """
+    (nom, mtime, taille) de chaque relevé du dossier : change quand un relevé
+    est ajouté, retiré ou réécrit sur place (le mtime du dossier, lui, ne
+    change pas dans ce dernier cas).
+    """
+    if not os.path.isdir(directory):
+        return ()
+    signature = []
+    for entry in os.scandir(directory):
+        if entry.name.lower().endswith('.csv'):
+            stat = entry.stat()
+            signature.append((entry.name, stat.st_mtime, stat.st_size))
+    return tuple(sorted(signature))
+
+
+def snapshot_jobs(paths):
+    """Lectures des relevés `paths` ({clé: chemin}) pour `ingest`."""
+    return {
+        key: FileJob(path, parse_positions_csv, 'positions', {'schema': POSITIONS})
+        for key, path in paths.items()
+    }
+
+
+def quantity_matrix(store, dates):
+    """
+    Matrice dates x ISIN des quantités détenues, construite en un seul pivot
+    sur l'ensemble des relevés puis prolongée jour par jour (ffill) jusqu'au
+    relevé suivant. Une ligne absente d'un relevé est considérée vendue (0) ;
+    avant le premier relevé, les quantités sont nulles.
+    """
+    quantities = _snapshot_table(store, 'quantity', 'sum').fillna(0)
+    return quantities.reindex(pd.DatetimeIndex(dates), method='ffill').fillna(0)
+
+
+def snapshot_prices(store):
+    """Table locale de prix dates d'arrêté x ISIN (`lastPrice` des relevés)."""
+    return _snapshot_table(store, 'lastPrice', 'last')
+
+
+def position_values(quantities, prices):
+    """
+    Valorisation dates x ISIN : quantités x derniers prix connus à chaque
+    date (prix prolongés par ffill), en une seule opération vectorisée.
+    """
+    prices = prices.reindex(columns=quantities.columns).sort_index()
+    prices = prices.reindex(prices.index.union(quantities.index)).ffill().reindex(quantities.index)
+    return quantities * prices.fillna(0)
+
+
+def position_history(store, dates, prices=None):
+    """
+    Historique de valeur du PEA ligne par ligne (colonnes : noms des lignes).
+    `prices` : table dates x ISIN ; par défaut les prix des relevés.
+    """
+    quantities = quantity_matrix(store, dates)
+    values = position_values(quantities, snapshot_prices(store) if prices is None else prices)
+    return values.rename(columns=isin_names(store))
+
+
+def isin_names(store):
+    """Nom le plus récent de chaque ISIN."""
+    names = {}
+    for as_of in store.as_of_dates:
+        names.update(zip(store.get(as_of)['isin'], store.get(as_of)['name']))
+    return names
+
+
+def first_held_dates(store):
+    """Date du premier relevé qui détient chaque ISIN (Series ISIN -> date d'arrêté)."""
+    first = {}
+    for as_of in store.as_of_dates:
+        for isin in store.get(as_of)['isin']:
+            first.setdefault(isin, as_of)
+    return pd.Series(first, dtype='datetime64[ns]')
+
+
+def _snapshot_table(store, column, aggfunc):
+    """Pivot dates d'arrêté x ISIN d'une colonne de tous les relevés."""
+    if not store.paths:
+        return pd.DataFrame(index=pd.DatetimeIndex([]), dtype=float)
+    long = pd.concat(
+        [store.get(as_of)[['isin', column]].assign(as_of=as_of) for as_of in store.as_of_dates],
+        ignore_index=True
+    )
+    return long.pivot_table(index='as_of', columns='isin', values=column, aggfunc=aggfunc)
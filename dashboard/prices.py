@@ -0,0 +1,132 @@
+# dashboard/prices.py
+import logging
+import os
+
+import pandas as pd
+
+from dashboard.cache import cache_path
+from dashboard.positions import snapshot_prices
+
+logger = logging.getLogger(__name__)
+
+PRICE_STORE_FILE = 'prices.parquet'
+TICKERS_FILE = 'data/tickers.csv'
+
+
+class PriceStore:
+    """
+    Cours de clôture stockés localement (ISIN x date, format long en Parquet).
+
+    La valorisation ne lit que ce stock : le réseau n'intervient que dans
+    `update_prices`, par lots, et le stock reste utilisable hors ligne.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or cache_path(PRICE_STORE_FILE)
+        if os.path.exists(self.path):
+            self.prices = pd.read_parquet(self.path)
+        else:
+            self.prices = pd.DataFrame({
+                'isin': pd.Series(dtype=str), 'date': pd.Series(dtype='datetime64[ns]'), 'close': pd.Series(dtype=float)
+            })
+
+    def last_dates(self):
+        """Dernière date stockée par ISIN."""
+        return self.prices.groupby('isin')['date'].max()
+
+    def append(self, new_prices):
+        """Ajoute des cours (isin, date, close), les plus récents remplaçant les doublons."""
+        if new_prices.empty:
+            return
+        prices = pd.concat([self.prices, new_prices[['isin', 'date', 'close']]], ignore_index=True)
+        prices['date'] = pd.to_datetime(prices['date']).astype('datetime64[ns]')
+        self.prices = prices.drop_duplicates(['isin', 'date'], keep='last').sort_values(['isin', 'date'], ignore_index=True)
+        tmp_path = self.path + '.tmp'
+        self.prices.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, self.path)
+
+    def table(self, isins=None):
+        """Table dates x ISIN des cours stockés."""
+        prices = self.prices if isins is None else self.prices[self.prices['isin'].isin(list(isins))]
+        return prices.pivot_table(index='date', columns='isin', values='close', aggfunc='last')
+
+
+class CsvPriceProvider:
+    """
+    Fournisseur de cours lu dans un fichier CSV local (isin;date;close),
+    utilisé hors ligne et pour les essais.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def fetch(self, isins, start):
+        prices = pd.read_csv(self.path, delimiter=';', parse_dates=['date'], decimal=',')
+        return prices[prices['isin'].isin(list(isins)) & (prices['date'] >= start)]
+
+
+class YFinanceProvider:
+    """
+    Cours de clôture Yahoo Finance, tous les titres en une seule requête.
+    Les ISIN sont traduits en tickers Yahoo via `data/tickers.csv` (isin;ticker).
+    """
+
+    def __init__(self, tickers_file=TICKERS_FILE):
+        self.tickers = {}
+        if os.path.exists(tickers_file):
+            mapping = pd.read_csv(tickers_file, delimiter=';')
+            self.tickers = dict(zip(mapping['isin'], mapping['ticker']))
+
+    def fetch(self, isins, start):
+        import yfinance as yf
+
+        tickers = {self.tickers[isin]: isin for isin in isins if isin in self.tickers}
+        missing = sorted(set(isins) - set(tickers.values()))
+        if missing:
+            logger.warning("Pas de ticker Yahoo pour : %s", ", ".join(missing))
+        if not tickers:
+            return pd.DataFrame(columns=['isin', 'date', 'close'])
+        data = yf.download(list(tickers), start=start, auto_adjust=False, progress=False, group_by='column')
+        # yfinance n'émet pas d'exception hors ligne : aucune cotation sur plus
+        # d'une semaine signale un échec plutôt qu'une absence de séance
+        if data.empty and pd.Timestamp(start) < pd.Timestamp.today() - pd.Timedelta(days=7):
+            raise ConnectionError("Aucun cours reçu de Yahoo Finance")
+        closes = data['Close'].rename(columns=tickers).rename_axis(index='date', columns='isin')
+        return closes.stack().rename('close').reset_index()
+
+
+def update_prices(store, provider, first_dates, today=None):
+    """
+    Mise à jour incrémentale en un seul lot des lignes `first_dates`
+    (Series ISIN -> date du premier relevé qui les détient, voir
+    `first_held_dates`) : chaque ligne repart du lendemain de sa dernière
+    date stockée, ou de son premier relevé si elle n'a jamais été
+    téléchargée. La requête part de la plus ancienne de ces dates, et seuls
+    les cours postérieurs sont ajoutés.
+    En cas d'échec (hors ligne...), le stock existant est conservé.
+    Retourne True si le stock a pu être mis à jour.
+    """
+    today = pd.Timestamp(today or pd.Timestamp.today()).normalize()
+    last_dates = store.last_dates().reindex(first_dates.index)
+    starts = (last_dates + pd.Timedelta(days=1)).fillna(pd.to_datetime(first_dates))
+    starts = starts[starts <= today]
+    if starts.empty:
+        return True
+    try:
+        new_prices = provider.fetch(list(starts.index), starts.min())
+    except Exception as e:
+        logger.warning("Cours non mis à jour (%d lignes), utilisation du stock local : %s", len(starts), e)
+        return False
+    new_prices = new_prices[pd.to_datetime(new_prices['date']) >= new_prices['isin'].map(starts)]
+    store.append(new_prices)
+    return True
+
+
+def price_table(price_store, positions_store):
+    """
+    Table de prix de valorisation : cours stockés, complétés par les
+    `lastPrice` des relevés de positions quand le stock n'a pas de cours.
+    """
+    snapshot_table = snapshot_prices(positions_store)
+    stored_table = price_store.table(snapshot_table.columns)
+    return stored_table.combine_first(snapshot_table)
@@ -0,0 +1,107 @@
+# dashboard/profiling.py
+"""
+Profilage léger des étapes d'un rerun : durées par étape, succès/échecs
+des caches et dimensions des tables produites.
+
+Désactivé par défaut : `stage`, `record_frame` et `count` ne coûtent alors
+qu'un test. Chaque rerun (ou commande) démarre son propre profil par
+`start_run`, rangé dans une variable de contexte : les sessions Streamlit,
+qui s'exécutent dans des threads distincts, ne se mélangent pas.
+"""
+import contextlib
+import contextvars
+import json
+import os
+import time
+
+from dashboard.cache import cache_path
+
+ENV_VAR = 'DASHBOARD_PROFILE'
+PROFILE_FILE = 'profil.jsonl'
+
+
+class Profiler:
+    def __init__(self, enabled=False, label=''):
+        self.enabled = enabled
+        self.label = label
+        self.started = time.time()
+        self.stages = []
+        self.frames = []
+        self.caches = {}
+        self._depth = 0
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Chronomètre le bloc ; les étapes imbriquées gardent leur profondeur."""
+        if not self.enabled:
+            yield
+            return
+        record = {'etape': name, 'profondeur': self._depth, 'secondes': None}
+        self.stages.append(record)
+        self._depth += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            record['secondes'] = time.perf_counter() - started
+            self._depth -= 1
+
+    def record_frame(self, name, frame):
+        """Dimensions (lignes, colonnes) d'un DataFrame ou d'un tableau."""
+        if self.enabled and frame is not None:
+            shape = tuple(getattr(frame, 'shape', (len(frame),)))
+            self.frames.append({'table': name, 'lignes': shape[0], 'colonnes': shape[1] if len(shape) > 1 else 1})
+
+    def count(self, cache, hit):
+        if self.enabled:
+            counters = self.caches.setdefault(cache, {'succes': 0, 'echecs': 0})
+            counters['succes' if hit else 'echecs'] += 1
+
+    def misses(self, cache):
+        return self.caches.get(cache, {}).get('echecs', 0)
+
+    def total_seconds(self):
+        return sum(stage['secondes'] or 0 for stage in self.stages if stage['profondeur'] == 0)
+
+    def to_dict(self):
+        return {
+            'horodatage': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'rerun': self.label, 'etapes': self.stages, 'caches': self.caches, 'tables': self.frames,
+        }
+
+    def export(self, path=None):
+        """Ajoute le profil du rerun en une ligne JSON (JSON Lines) ; retourne le chemin."""
+        path = path or cache_path(PROFILE_FILE)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(self.to_dict(), ensure_ascii=False) + '\n')
+        return path
+
+
+_current = contextvars.ContextVar('profiler', default=Profiler())
+
+
+def env_enabled():
+    return os.environ.get(ENV_VAR, '').lower() in ('1', 'true', 'oui')
+
+
+def start_run(enabled=None, label=''):
+    """Nouveau profil pour le rerun ou la commande en cours."""
+    profiler = Profiler(env_enabled() if enabled is None else enabled, label)
+    _current.set(profiler)
+    return profiler
+
+
+def current():
+    return _current.get()
+
+
+def stage(name):
+    return current().stage(name)
+
+
+def record_frame(name, frame):
+    current().record_frame(name, frame)
+
+
+def count(cache, hit):
+    current().count(cache, hit)
@@ -0,0 +1,190 @@
+# dashboard/schema.py
+"""
+Schémas des fichiers d'entrée : validation et typage à l'ingestion.
+
+Chaque table lue est validée une seule fois, à la lecture du fichier ; le
+résultat typé est ce que met en cache le Parquet, et le code en aval reçoit
+des colonnes déjà typées :
+
+- 'date' : datetime64 ;
+- 'category' : texte répétitif (investisseur, source), catégoriel ;
+- 'text' : texte libre ;
+- 'number' : float32 quand la conversion est sans perte (montants ronds,
+  quantités), float64 sinon.
+
+Les colonnes sont retrouvées par leur nom (ou un alias), sans tenir compte
+de la casse ni des espaces. Une colonne 'number' peut porter des bornes
+(`bounds`) : une valeur hors bornes est invalide. Une colonne manquante ou des lignes invalides
+lèvent `SchemaError` avec le numéro de ligne du fichier de chaque erreur.
+"""
+import dataclasses
+
+import numpy as np
+import pandas as pd
+
+KINDS = ('date', 'category', 'text', 'number')
+# Erreurs détaillées dans le message (toutes restent dans `SchemaError.rows`)
+MAX_REPORTED_ROWS = 10
+
+
+@dataclasses.dataclass(frozen=True)
+class Column:
+    """
+    Colonne attendue. Obligatoire (`required`) : présente dans le fichier et
+    renseignée sur chaque ligne ; sinon elle peut manquer ou être vide, mais
+    une valeur présente doit être convertible. `bounds` (min, max), inclus,
+    borne les valeurs d'une colonne 'number'.
+    """
+    name: str
+    kind: str
+    required: bool = True
+    aliases: tuple = ()
+    bounds: tuple = None
+
+
+@dataclasses.dataclass(frozen=True)
+class Schema:
+    name: str
+    columns: tuple
+
+
+class SchemaError(ValueError):
+    """
+    Fichier non conforme à son schéma. `rows` liste les erreurs, une par
+    ligne et colonne : DataFrame ligne / colonne / valeur (valeur vide et
+    ligne 1, l'en-tête, pour une colonne manquante).
+    """
+
+    def __init__(self, message, rows=None):
+        super().__init__(message)
+        self.rows = rows if rows is not None else pd.DataFrame(columns=['ligne', 'colonne', 'valeur'])
+
+
+APPORTS = Schema('apports', (
+    Column('Date', 'date'),
+    Column('NomInvestisseur', 'category', aliases=('Investisseur',)),
+    Column('Montant', 'number'),
+    Column('SourcePlacement', 'category', aliases=('Source',)),
+))
+
+SOURCES = Schema('sources', (
+    Column('NomSource', 'text'),
+    Column('TypeSource', 'text', required=False),
+    Column('Valorisation', 'text', required=False),
+    # Taux annuel en pourcentage (5 pour 5 %)
+    Column('Taux', 'number', required=False, bounds=(0, 100)),
+    Column('FichierValorisation', 'text', required=False),
+))
+
+# Série date / valeur d'une source valorisée par import (export du courtier pour le PEA)
+VALUE_SERIES = Schema('serie', (
+    Column('Date', 'date'),
+    Column('Valeur', 'number', aliases=('Valorisation portefeuille', 'Valorisation', 'Montant')),
+))
+
+POSITIONS = Schema('positions', (
+    Column('name', 'text'),
+    Column('isin', 'text'),
+    Column('quantity', 'number'),
+    Column('lastPrice', 'number'),
+    Column('buyingPrice', 'number', required=False),
+    Column('intradayVariation', 'number', required=False),
+    Column('amount', 'number', required=False),
+    Column('amountVariation', 'number', required=False),
+    Column('variation', 'number', required=False),
+))
+
+
+def read_table(path, schema):
+    """Classeur Excel lu puis validé par `schema` (lecteur pour `read_cached` et `ingest`)."""
+    return validate(pd.read_excel(path), schema, path)
+
+
+def validate(df, schema, source='', header_rows=1):
+    """
+    Table typée selon `schema` : colonnes du schéma renommées et converties,
+    dans l'ordre du schéma, suivies des autres colonnes inchangées. Les
+    lignes entièrement vides sont ignorées. `header_rows` sert à retrouver
+    le numéro de ligne dans le fichier (ligne 1 = en-tête).
+    """
+    source = source or schema.name
+    mapping = {header: name for header, name in _header_mapping(df.columns, schema, source).items() if header != name}
+    if mapping:
+        df = df.rename(columns=mapping)
+    # Numéro de ligne dans le fichier de chaque ligne, après retrait des lignes vides
+    line_numbers = np.arange(len(df.index)) + header_rows + 1
+    empty = df.isna().to_numpy().all(axis=1)
+    if empty.any():
+        df, line_numbers = df[~empty], line_numbers[~empty]
+
+    typed, errors = {}, []
+    for column in schema.columns:
+        if column.name not in df.columns:
+            continue
+        raw = df[column.name]
+        values = _coerce(raw, column.kind)
+        missing = pd.isna(values)
+        # Cas courant sans valeur manquante : la colonne brute n'est pas réexaminée
+        bad = missing & (raw.notna().to_numpy() | column.required) if missing.any() else missing
+        if column.bounds is not None:
+            low, high = column.bounds
+            bad |= (values < low) | (values > high)
+        if bad.any():
+            errors += [(line, column.name, value) for line, value in zip(line_numbers[bad], raw[bad].tolist())]
+        typed[column.name] = values
+    if errors:
+        rows = pd.DataFrame(errors, columns=['ligne', 'colonne', 'valeur']).sort_values(['ligne', 'colonne'])
+        details = ', '.join(f"ligne {line} ({name} = {value!r})" for line, name, value in rows.head(MAX_REPORTED_ROWS).itertuples(index=False))
+        more = f" et {len(rows) - MAX_REPORTED_ROWS} autre(s)" if len(rows) > MAX_REPORTED_ROWS else ''
+        raise SchemaError(f"{source} : {len(rows)} valeur(s) invalide(s) : {details}{more}", rows.reset_index(drop=True))
+
+    # Tableaux sans index : la table typée repart d'un index 0..n-1
+    typed.update((name, df[name].array) for name in df.columns if name not in typed)
+    return pd.DataFrame(typed)
+
+
+def _header_mapping(headers, schema, source):
+    """En-têtes du fichier -> noms du schéma ; SchemaError si une colonne obligatoire manque."""
+    by_key = {_header_key(header): header for header in headers}
+    mapping, missing = {}, []
+    for column in schema.columns:
+        found = next((by_key[key] for key in map(_header_key, (column.name, *column.aliases)) if key in by_key), None)
+        if found is not None:
+            mapping[found] = column.name
+        elif column.required:
+            missing.append(column.name)
+    if missing:
+        raise SchemaError(
+            f"{source} : colonne(s) manquante(s) : {', '.join(missing)} "
+            f"(colonnes lues : {', '.join(map(str, headers))})",
+            pd.DataFrame({'ligne': [1] * len(missing), 'colonne': missing, 'valeur': [None] * len(missing)}),
+        )
+    return mapping
+
+
+def _header_key(header):
+    return ' '.join(str(header).split()).casefold()
+
+
+def _coerce(raw, kind):
+    """
+    Conversion d'une colonne en tableau typé ; les valeurs non convertibles
+    deviennent manquantes. Une colonne déjà du bon type n'est pas réanalysée.
+    """
+    if kind == 'date':
+        return pd.to_datetime(raw, errors='coerce').array
+    if kind == 'number':
+        if not pd.api.types.is_numeric_dtype(raw.dtype) or pd.api.types.is_bool_dtype(raw.dtype):
+            raw = pd.to_numeric(raw, errors='coerce')
+        values = raw.to_numpy(dtype='float64', na_value=np.nan)
+        compact = values.astype('float32')
+        return compact if np.array_equal(compact, values, equal_nan=True) else values
+    if kind in ('text', 'category'):
+        if not pd.api.types.is_string_dtype(raw.dtype):
+            raw = raw.astype('str').where(raw.notna())
+        text = raw.str.strip()
+        blank = np.asarray(text.array == '', dtype=bool)
+        if blank.any():
+            text = text.mask(blank)
+        return text.astype('category').array if kind == 'category' else text.array
+    raise ValueError(f"Type de colonne inconnu : {kind} (attendu : {', '.join(KINDS)})")
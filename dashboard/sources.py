@@ -0,0 +1,119 @@
+# dashboard/sources.py
+"""
+Valorisation quotidienne des sources de placement.
+
+Les sources sont décrites dans `data/sources_placement.xlsx` (NomSource,
+TypeSource, ...). Colonnes optionnelles lues si présentes :
+
+- `Valorisation` : 'apports' (cumul des apports, 0 %), 'taux_fixe' (intérêts
+  simples), 'capitalisation_quotidienne' ou 'serie' (valeurs importées) ;
+- `Taux` : taux annuel en pourcentage (5 pour 5 %) des méthodes à taux,
+  entre 0 et 100 ;
+- `FichierValorisation` : classeur date / valeur de la méthode 'serie',
+  relatif au dossier de données du portefeuille.
+
+Sans ces colonnes, une source de type PEA est valorisée par
+`data/performance_pea.xlsx` et les autres par le cumul de leurs apports.
+"""
+import dataclasses
+import functools
+import os
+
+import numpy as np
+import pandas as pd
+
+from dashboard.loaders import read_cached
+from dashboard.schema import SOURCES, VALUE_SERIES, read_table
+
+SOURCES_FILE = 'data/sources_placement.xlsx'
+PEA_PERF_FILE = 'data/performance_pea.xlsx'
+METHODS = ('apports', 'taux_fixe', 'capitalisation_quotidienne', 'serie')
+
+
+@dataclasses.dataclass(frozen=True)
+class SourceSpec:
+    name: str
+    method: str = 'apports'
+    rate: float = 0.0
+    value_file: str = None
+
+
+def read_source_specs(path=SOURCES_FILE, pea_perf_file=PEA_PERF_FILE, data_dir=None):
+    """
+    Description des sources déclarées, par nom (dict vide si le fichier est
+    absent). Les `FichierValorisation` relatifs sont rattachés à `data_dir`
+    (par défaut, le dossier du fichier des sources).
+    """
+    if not os.path.exists(path):
+        return {}
+    data_dir = os.path.dirname(path) if data_dir is None else data_dir
+    return parse_source_specs(read_cached(path, read_table, 'excel', schema=SOURCES), pea_perf_file, data_dir)
+
+
+def parse_source_specs(df_sources, pea_perf_file=PEA_PERF_FILE, data_dir='data'):
+    """Description des sources, par nom, à partir de la table des sources déjà validée."""
+    specs = {}
+    for row in df_sources.to_dict('records'):
+        name = row['NomSource']
+        is_pea = (_cell(row, 'TypeSource') or '').upper() == 'PEA' or name.upper() == 'PEA'
+        method = (_cell(row, 'Valorisation') or ('serie' if is_pea else 'apports')).lower()
+        if method not in METHODS:
+            raise ValueError(f"Méthode de valorisation inconnue pour {name} : {method}")
+        value_file = _cell(row, 'FichierValorisation')
+        specs[name] = SourceSpec(
+            name=name, method=method, rate=float(_cell(row, 'Taux') or 0) / 100,
+            value_file=os.path.join(data_dir, value_file) if value_file else (pea_perf_file if method == 'serie' else None),
+        )
+    return specs
+
+
+def default_spec(name, pea_perf_file=PEA_PERF_FILE):
+    """Source absente du fichier des sources : PEA par sa série, les autres au cumul des apports."""
+    if name.upper() == 'PEA':
+        return SourceSpec(name, 'serie', value_file=pea_perf_file)
+    return SourceSpec(name)
+
+
+def source_values(spec, dates, inflows, df_values=None):
+    """
+    Valeur quotidienne d'une source sur `dates` à partir de ses apports du
+    jour (`inflows`). Méthode 'serie' : valeurs de `df_values`, la table
+    date / valeur déjà lue à l'ingestion (lue ici si elle n'est pas
+    fournie). Les méthodes à taux sont mises en cache par source : ajouter
+    ou modifier une source ne recalcule pas les autres.
+    """
+    dates = pd.DatetimeIndex(dates)
+    if spec.method == 'serie':
+        if df_values is None:
+            df_values = read_cached(spec.value_file, read_table, 'excel', schema=VALUE_SERIES)
+        series = pd.Series(df_values['Valeur'].to_numpy(dtype=float), index=pd.DatetimeIndex(df_values['Date']))
+        return series.sort_index().reindex(dates, method='ffill').fillna(0).to_numpy()
+    inflows = np.ascontiguousarray(inflows, dtype=float)
+    values = _cached_source_values(spec, dates[0], len(dates), inflows.tobytes())
+    return values.copy()
+
+
+@functools.lru_cache(maxsize=64)
+def _cached_source_values(spec, first_day, n_days, inflows_bytes):
+    inflows = np.frombuffer(inflows_bytes, dtype=float)
+    days = np.arange(n_days, dtype=float)
+
+    if spec.method == 'taux_fixe':
+        # Intérêts simples : somme des a_k * (1 + r * (t - t_k) / 365)
+        capital = np.cumsum(inflows)
+        return capital + spec.rate / 365 * (days * capital - np.cumsum(inflows * days))
+    if spec.method == 'capitalisation_quotidienne':
+        # Somme des a_k * g^(t - t_k) avec g = (1 + r)^(1/365), via cumsum
+        log_growth = np.log1p(spec.rate) / 365
+        return np.exp(days * log_growth) * np.cumsum(inflows * np.exp(-days * log_growth))
+    return np.cumsum(inflows)
+
+
+def valuation_files(specs):
+    """Fichiers de valeurs importées utilisés par les sources."""
+    return sorted({spec.value_file for spec in specs if spec.method == 'serie'})
+
+
+def _cell(row, column):
+    value = row.get(column)
+    return None if value is None or pd.isna(value) or value == '' else value
@@ -0,0 +1,55 @@
+# tabs/diagnostics.py
+import functools
+
+import streamlit as st
+
+from dashboard import profiling
+
+QUERY_PARAM = 'profil'
+
+def profiling_enabled():
+    """Profilage demandé par la variable DASHBOARD_PROFILE ou par `?profil=1` dans l'URL."""
+    return profiling.env_enabled() or st.query_params.get(QUERY_PARAM, '').lower() in ('1', 'true', 'oui')
+
+def profiled_cache(name, **cache_kwargs):
+    """
+    `st.cache_data` instrumenté : chaque appel est chronométré sous `name` et
+    compté comme succès (résultat servi par le cache) ou échec (fonction exécutée).
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def on_miss(*args, **kwargs):
+            profiling.count(name, False)
+            return func(*args, **kwargs)
+        cached = st.cache_data(**cache_kwargs)(on_miss)
+
+        @functools.wraps(func)
+        def call(*args, **kwargs):
+            profiler = profiling.current()
+            misses = profiler.misses(name)
+            with profiler.stage(name):
+                result = cached(*args, **kwargs)
+            if profiler.misses(name) == misses:
+                profiler.count(name, True)
+            return result
+        call.clear = cached.clear
+        return call
+    return decorate
+
+def display_panel(profiler):
+    """Panneau « Diagnostics » de la barre latérale : détail du rerun et export JSON Lines."""
+    import pandas as pd
+
+    path = profiler.export()
+    with st.sidebar.expander(f"Diagnostics ({profiler.total_seconds() * 1000:.0f} ms)"):
+        if profiler.stages:
+            st.dataframe(pd.DataFrame({
+                'Étape': [' ' * stage['profondeur'] + stage['etape'] for stage in profiler.stages],
+                'ms': [round((stage['secondes'] or 0) * 1000, 1) for stage in profiler.stages],
+            }), hide_index=True)
+        if profiler.caches:
+            st.dataframe(pd.DataFrame(profiler.caches).T.rename_axis('Cache').reset_index(), hide_index=True)
+        if profiler.frames:
+            st.dataframe(pd.DataFrame(profiler.frames), hide_index=True)
+        with open(path, 'rb') as f:
+            st.download_button("Exporter les mesures (JSONL)", f.read(), file_name='profil.jsonl', mime='application/jsonl')
@@ -0,0 +1,60 @@
+# tabs/graphiques.py
+import numpy as np
+import pandas as pd
+
+# Largeur de référence d'un graphique en pleine largeur (layout "wide")
+DEFAULT_CHART_WIDTH = 1200
+# Au-delà de ~2 points par pixel, les points supplémentaires ne sont plus visibles
+POINTS_PER_PIXEL = 2
+
+
+def max_points(width_px=DEFAULT_CHART_WIDTH):
+    """Nombre maximal de points utiles pour un graphique de cette largeur."""
+    return int(width_px * POINTS_PER_PIXEL)
+
+
+def downsample_indices(series, n_points):
+    """
+    Indices conservés par un sous-échantillonnage min/max par paquets.
+
+    Pour chaque paquet de lignes consécutives on garde, pour chaque série,
+    le point minimal et le point maximal : pics et creux restent visibles.
+    Le premier et le dernier point sont toujours conservés.
+    """
+    n = len(series[0])
+    if n <= n_points:
+        return np.arange(n)
+    n_buckets = max(1, n_points // (2 * len(series)))
+    bucket_size = -(-n // n_buckets)
+    padding = n_buckets * bucket_size - n
+    kept = [np.array([0, n - 1])]
+    offsets = np.arange(n_buckets) * bucket_size
+    for values in series:
+        values = np.asarray(values, dtype=float)
+        # NaN et lignes de remplissage ne doivent jamais être choisis
+        lows = np.pad(np.where(np.isnan(values), np.inf, values), (0, padding), constant_values=np.inf)
+        highs = np.pad(np.where(np.isnan(values), -np.inf, values), (0, padding), constant_values=-np.inf)
+        kept.append(offsets + lows.reshape(n_buckets, bucket_size).argmin(axis=1))
+        kept.append(offsets + highs.reshape(n_buckets, bucket_size).argmax(axis=1))
+    indices = np.unique(np.concatenate(kept))
+    return indices[indices < n]
+
+
+def prepare_series(data, x_key, y_keys, width_px=DEFAULT_CHART_WIDTH):
+    """
+    Sous-échantillonne des séries temporelles selon la largeur du graphique.
+    La plage de dates et la résolution sont déjà appliquées en amont
+    (`dashboard.ledger.window_rows`) ; une plage étroite garde toute la résolution.
+
+    `data` est un DataFrame ou un dict de tableaux de même longueur ;
+    toutes les colonnes/clés sont conservées, le sous-échantillonnage est
+    calculé sur `y_keys`.
+    """
+    if isinstance(data, pd.DataFrame):
+        indices = downsample_indices([data[key].to_numpy() for key in y_keys], max_points(width_px))
+        return data.iloc[indices] if len(indices) < len(data) else data
+    data = {key: np.asarray(values) for key, values in data.items()}
+    indices = downsample_indices([data[key] for key in y_keys], max_points(width_px))
+    if len(indices) == len(data[x_key]):
+        return data
+    return {key: values[indices] for key, values in data.items()}
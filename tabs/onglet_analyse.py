@@ -3,21 +3,108 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import os
-import glob
 
-def get_latest_positions_file(directory="data/Positions"):
-    """Trouve le fichier de positions le plus récent dans le dossier spécifié."""
+from dashboard.allocation import GROUPINGS, current_allocation, group_allocation, liquidity
+from dashboard.cache import cache_path
+from dashboard.positions import POSITIONS_DIR, PositionsStore, first_held_dates, position_history, snapshot_signature
+from dashboard.prices import PRICE_STORE_FILE, PriceStore, YFinanceProvider, price_table, update_prices
+from dashboard import profiling
+from tabs.diagnostics import profiled_cache
+from tabs.graphiques import prepare_series
+
+@profiled_cache('releves_positions', max_entries=8)
+def load_positions_store(directory, snapshots):
+    """
+    Relevés de positions indexés par date d'arrêté et lus une seule fois.
+    `snapshots` (nom, mtime, taille de chaque relevé) invalide le cache quand
+    un relevé est ajouté, retiré ou réécrit sur place.
+    """
+    return PositionsStore(directory).load_all()
+
+@profiled_cache('table_prix', max_entries=8)
+def load_price_table(directory, snapshots, prices_mtime):
+    """
+    Prix de valorisation (dates x ISIN) lus uniquement dans le stock local
+    de cours, complétés par les prix des relevés.
+    """
+    return price_table(PriceStore(), load_positions_store(directory, snapshots))
+
+@profiled_cache('historique_lignes', max_entries=32)
+def get_pea_lines_history(directory, snapshots, prices_mtime, _dates, dates_key):
+    """
+    Valeur de chaque ligne du PEA aux dates demandées, à partir de tous les
+    relevés (quantités prolongées entre relevés). `dates_key` identifie `_dates`.
+    """
+    store = load_positions_store(directory, snapshots)
+    return position_history(store, _dates, load_price_table(directory, snapshots, prices_mtime))
+
+@profiled_cache('repartition', max_entries=16)
+def get_current_allocation(directory, snapshots, prices_mtime, last_values):
+    """
+    Table de répartition actuelle (positions valorisées au dernier cours
+    stocké, liquidité du PEA, sources hors PEA), partagée par les KPIs et le
+    graphique de répartition. Les relevés sont déjà validés et typés ; un
+    relevé illisible est écarté par le store et signalé par l'onglet.
+    """
+    _, df_positions = load_positions_store(directory, snapshots).latest()
+    if df_positions is not None:
+        # Valorisation au dernier cours connu du stock local
+        latest_prices = load_price_table(directory, snapshots, prices_mtime).ffill().iloc[-1]
+        df_positions = df_positions.assign(Valeur=df_positions['quantity'] * df_positions['isin'].map(latest_prices).fillna(df_positions['lastPrice']))
+    return current_allocation(df_positions, last_values)
+
+def get_mtime(path):
     try:
-        list_of_files = glob.glob(os.path.join(directory, '*.csv'))
-        if not list_of_files: return None
-        latest_file = max(list_of_files, key=os.path.getctime)
-        return latest_file
-    except Exception:
+        return os.stat(path).st_mtime
+    except OSError:
         return None
 
-def display_tab(df_portfolio_history):
+def update_market_prices(positions_dir):
+    """Télécharge en un lot les cours manquants de toutes les lignes des relevés."""
+    store = load_positions_store(positions_dir, snapshot_signature(positions_dir))
+    with st.spinner("Mise à jour des cours..."):
+        if not update_prices(PriceStore(), YFinanceProvider(), first_held_dates(store)):
+            st.warning("Cours indisponibles (hors ligne ?) : les derniers cours stockés sont utilisés.")
+
+def build_assets_figure(df_chart, asset_columns):
+    """Aires empilées de la valeur par classe d'actifs."""
+    return px.area(
+        df_chart, x='Date', y=asset_columns,
+        title="Historique de la Valeur par Classe d'Actifs"
+    )
+
+def build_lines_figure(df_lines_chart, line_columns):
+    """Aires empilées de la valeur du PEA par ligne (liquidité comprise)."""
+    return px.area(
+        df_lines_chart, x='Date', y=line_columns,
+        title="Historique de la Valeur du PEA par Ligne", labels={'value': 'Valeur en €', 'variable': 'Ligne'}
+    )
+
+def build_allocation_figure(df_grouped, grouping):
+    """Barres de la répartition actuelle, regroupée selon `grouping`."""
+    # --- LIGNES MODIFIÉES ---
+    fig_bar = px.bar(
+        df_grouped, 
+        x=GROUPINGS[grouping], 
+        y='Valeur',
+        title='Détail de la Valeur Actuelle par Actif',
+        text_auto='.2s', 
+        color='Valeur', # La couleur est maintenant basée sur la valeur de la barre
+        color_continuous_scale='Blues' # Utilisation d'un dégradé de bleu
+    )
+    fig_bar.update_traces(textposition='outside')
+    # On cache l'échelle de couleur qui apparaît avec un dégradé
+    fig_bar.update_layout(coloraxis_showscale=False) 
+    # --------------------
+    return fig_bar
+
+def display_tab(df_portfolio_history, window_rows, positions_dir=POSITIONS_DIR):
     """
     Affiche l'analyse globale du portefeuille avec le détail des positions.
+
+    `window_rows` : lignes de la période/résolution choisie pour l'historique,
+    les KPIs restent ceux du dernier jour. `positions_dir` : relevés de
+    positions du portefeuille affiché (le stock de cours est commun).
     """
     st.header("Analyse Globale du Portefeuille")
 
@@ -30,73 +117,57 @@ def display_tab(df_portfolio_history):
     
     st.subheader("Situation Actuelle")
     
-    valeur_pea_total = last_day_data.get('PEA', 0)
-    valeur_actions_investies = 0
-    df_positions = None
-    liquidite_pea = 0
-    
-    positions_file = get_latest_positions_file()
-    if positions_file:
-        try:
-            df_positions = pd.read_csv(positions_file, delimiter=';', encoding='utf-8-sig', decimal=',')
-            df_positions.columns = [col.strip() for col in df_positions.columns]
-            df_positions['quantity'] = pd.to_numeric(df_positions['quantity'])
-            df_positions['lastPrice'] = pd.to_numeric(df_positions['lastPrice'])
-            df_positions['Valeur'] = df_positions['quantity'] * df_positions['lastPrice']
-            valeur_actions_investies = df_positions['Valeur'].sum()
-        except Exception:
-            df_positions = None
-
-    liquidite_pea = valeur_pea_total - valeur_actions_investies
-    liquidite_pea = max(0, liquidite_pea)
+    if st.button("Mettre à jour les cours", help="Télécharge les cours de clôture manquants (Yahoo Finance)."):
+        update_market_prices(positions_dir)
+    positions_snapshots = snapshot_signature(positions_dir)
+    prices_mtime = get_mtime(cache_path(PRICE_STORE_FILE))
+    for path, error in load_positions_store(positions_dir, positions_snapshots).errors.items():
+        st.warning(f"Relevé de positions ignoré, illisible : {os.path.basename(path)} ({error})")
+    last_values = last_day_data[asset_columns].astype(float)
+    df_assets = get_current_allocation(positions_dir, positions_snapshots, prices_mtime, last_values)
+    liquidite_pea = liquidity(df_assets)
 
     kpi_cols = st.columns(len(asset_columns) + 2)
     kpi_cols[0].metric("Valeur Totale", f"{last_day_data['PortfolioValue_Global']:,.2f} €".replace(",", " "))
-    for i, asset in enumerate(asset_columns):
-        kpi_cols[i+1].metric(f"Part {asset}", f"{last_day_data[asset]:,.2f} €".replace(",", " "))
+    for kpi_col, (asset, value) in zip(kpi_cols[1:], last_values.items()):
+        kpi_col.metric(f"Part {asset}", f"{value:,.2f} €".replace(",", " "))
     kpi_cols[len(asset_columns) + 1].metric("Liquidité (Cash PEA)", f"{liquidite_pea:,.2f} €".replace(",", " "), help="Valeur totale du PEA moins la valeur des actions détenues.")
 
     st.subheader("Évolution par Classe d'Actifs")
-    fig_area = px.area(
-        df_portfolio_history, x='Date', y=asset_columns,
-        title="Historique de la Valeur par Classe d'Actifs"
-    )
+    df_chart = prepare_series(df_portfolio_history.iloc[window_rows], 'Date', asset_columns + ['PortfolioValue_Global'])
+    with profiling.stage('figures'):
+        fig_area = build_assets_figure(df_chart, asset_columns)
     st.plotly_chart(fig_area, use_container_width=True)
 
+    st.subheader("Évolution des Lignes du PEA")
+    df_window = df_portfolio_history.iloc[window_rows]
+    dates = pd.DatetimeIndex(df_window['Date'])
+    df_lines = get_pea_lines_history(
+        positions_dir, positions_snapshots, prices_mtime, dates, (dates[0], dates[-1], len(dates))
+    )
+    if len(df_lines.columns) > 0:
+        line_columns = list(df_lines.columns)
+        lines_total = df_lines.sum(axis=1).to_numpy()
+        df_lines['Liquidité (Cash PEA)'] = (df_window['PEA'].to_numpy() - lines_total).clip(min=0)
+        # On ne trace qu'à partir du premier relevé de positions
+        df_lines = df_lines[lines_total > 0].rename_axis('Date').reset_index()
+        if not df_lines.empty:
+            df_lines_chart = prepare_series(df_lines, 'Date', line_columns + ['Liquidité (Cash PEA)'])
+            with profiling.stage('figures'):
+                fig_lines = build_lines_figure(df_lines_chart, line_columns + ['Liquidité (Cash PEA)'])
+            st.plotly_chart(fig_lines, use_container_width=True)
+        else:
+            st.info("Aucun relevé de positions dans la période affichée.")
+    else:
+        st.info("Aucun relevé de positions disponible pour l'historique par ligne.")
+
     st.subheader("Répartition Détaillée des Actifs Actuels")
-    asset_data = []
+    grouping = st.radio("Regrouper par", list(GROUPINGS), horizontal=True)
 
-    if df_positions is not None:
-        for index, row in df_positions.iterrows():
-            asset_data.append({'Actif': row['name'], 'Type': 'Action PEA', 'Valeur': row['Valeur']})
-
-    if liquidite_pea > 0.01:
-        asset_data.append({'Actif': 'Liquidité (Cash PEA)', 'Type': 'Cash', 'Valeur': liquidite_pea})
-
-    for asset in asset_columns:
-        if asset != 'PEA':
-             asset_data.append({'Actif': asset, 'Type': 'Autre', 'Valeur': last_day_data[asset]})
-
-    if asset_data:
-        df_assets = pd.DataFrame(asset_data).dropna(subset=['Valeur'])
-        df_assets = df_assets[df_assets['Valeur'].abs() > 0.01]
-        df_assets = df_assets.sort_values('Valeur', ascending=False)
-
-        # --- LIGNES MODIFIÉES ---
-        fig_bar = px.bar(
-            df_assets, 
-            x='Actif', 
-            y='Valeur',
-            title='Détail de la Valeur Actuelle par Actif',
-            text_auto='.2s', 
-            color='Valeur', # La couleur est maintenant basée sur la valeur de la barre
-            color_continuous_scale='Blues' # Utilisation d'un dégradé de bleu
-        )
-        fig_bar.update_traces(textposition='outside')
-        # On cache l'échelle de couleur qui apparaît avec un dégradé
-        fig_bar.update_layout(coloraxis_showscale=False) 
-        # --------------------
-        
+    if not df_assets.empty:
+        df_grouped = group_allocation(df_assets, grouping)
+        with profiling.stage('figures'):
+            fig_bar = build_allocation_figure(df_grouped, grouping)
         st.plotly_chart(fig_bar, use_container_width=True)
     else:
         st.warning("Aucune donnée d'actif disponible pour afficher la répartition.")
\ No newline at end of file
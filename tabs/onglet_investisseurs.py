@@ -1,34 +1,218 @@
 # tabs/onglet_investisseurs.py
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+import numpy as np
 import plotly.graph_objects as go
 
+from dashboard import profiling
+from dashboard.fees import CRYSTALLIZATIONS, DEFAULT_MODEL, DEFAULT_SCENARIOS, FeeModel, fee_scenarios, net_performance
+from dashboard.ledger import window_rows
+from dashboard.metrics import ROLLING_WINDOW, investor_metrics, rolling_volatility
+from tabs.diagnostics import profiled_cache
+from tabs.graphiques import prepare_series
+
 def format_eur(val):
     if pd.isna(val) or not isinstance(val, (int, float, complex)): return val
     return f"{val:,.2f} €".replace(",", " ").replace(".00", "")
 
-def display_tab(df_perf, df_apports):
+@profiled_cache('perf_nette', max_entries=32)
+def get_net_performance(_ledger, cache_key, investor, start=None, end=None, freq='D', model=DEFAULT_MODEL):
+    """
+    Performance nette d'un investisseur sur une fenêtre et à une résolution,
+    mémoïsée sur (données, investisseur, fenêtre, barème).
+    """
+    rows = window_rows(_ledger.dates, start, end, freq)
+    return net_performance(_ledger, investor, model, rows)
+
+@profiled_cache('scenarios_frais', max_entries=32)
+def get_fee_scenarios(_ledger, cache_key, investor, models, start=None, end=None, freq='D'):
+    """
+    Valeur nette d'un investisseur sous chaque barème de `models`, évalués en
+    une seule passe. Retourne (dates, {champ: matrice lignes x scénarios}).
+    """
+    rows = window_rows(_ledger.dates, start, end, freq)
+    return _ledger.dates[rows].to_numpy(), fee_scenarios(_ledger, investor, models, rows)
+
+@profiled_cache('indicateurs', max_entries=8)
+def get_investor_metrics(_ledger, cache_key, model=DEFAULT_MODEL):
+    """
+    Indicateurs de tous les investisseurs (TWR, TRI, drawdown, volatilité),
+    calculés une fois par état NAV (`cache_key`) et barème (TRI net), et
+    partagés par les reruns.
+    """
+    df_metrics = investor_metrics(_ledger, model)
+    current_volatility = rolling_volatility(_ledger.nav)[-1]
+    return df_metrics, current_volatility
+
+def build_metrics_table(df_metrics):
+    """Table de comparaison affichée : montants en €, taux en %."""
+    percent_columns = [col for col in df_metrics.columns if col not in ('capital', 'valeur_part')]
+    df_table = df_metrics.copy()
+    df_table[percent_columns] = df_table[percent_columns] * 100
+    return df_table.reset_index()
+
+METRICS_COLUMNS = {
+    'investisseur': st.column_config.TextColumn("Investisseur"),
+    'capital': st.column_config.NumberColumn("Capital Apporté", format="%.2f €"),
+    'valeur_part': st.column_config.NumberColumn("Valeur Brute", format="%.2f €"),
+    'twr': st.column_config.NumberColumn("Rendement (TWR)", format="%.2f %%", help="Rendement pondéré par le temps depuis le premier apport."),
+    'twr_annualise': st.column_config.NumberColumn("TWR Annualisé", format="%.2f %%"),
+    'tri_brut': st.column_config.NumberColumn("TRI Brut", format="%.2f %%", help="Taux de rendement interne (pondéré par les montants) sur la valeur brute."),
+    'tri_net': st.column_config.NumberColumn("TRI Net", format="%.2f %%", help="TRI sur la valeur nette de frais et d'impôt latent."),
+    'drawdown_max': st.column_config.NumberColumn("Drawdown Max", format="%.2f %%", help="Plus forte baisse depuis un plus haut pendant la détention."),
+    'volatilite': st.column_config.NumberColumn("Volatilité Annualisée", format="%.2f %%"),
+}
+
+SCENARIO_COLUMNS = {
+    'name': st.column_config.TextColumn("Scénario", required=True),
+    'fee_rate': st.column_config.NumberColumn("Commission (%)", min_value=0.0, max_value=100.0, step=0.5, format="%.2f"),
+    'tax_rate': st.column_config.NumberColumn("Impôt (%)", min_value=0.0, max_value=100.0, step=0.5, format="%.2f"),
+    'hurdle': st.column_config.NumberColumn("Hurdle annuel (%)", min_value=0.0, max_value=100.0, step=0.5, format="%.2f",
+                                            help="Rendement annuel minimal avant commission."),
+    'high_water_mark': st.column_config.CheckboxColumn("High-water mark", help="Commission due seulement au-delà du plus haut atteint."),
+    'crystallization': st.column_config.SelectboxColumn("Cristallisation", options=list(CRYSTALLIZATIONS), required=True),
+}
+PERCENT_FIELDS = ('fee_rate', 'tax_rate', 'hurdle')
+
+def scenarios_frame(models):
+    """Barèmes sous forme de table éditable (taux en %)."""
+    labels = {key: label for label, key in CRYSTALLIZATIONS.items()}
+    return pd.DataFrame([{
+        'name': m.name,
+        **{field: getattr(m, field) * 100 for field in PERCENT_FIELDS},
+        'high_water_mark': m.high_water_mark,
+        'crystallization': labels[m.crystallization],
+    } for m in models], columns=list(SCENARIO_COLUMNS))
+
+def models_from_frame(df_scenarios):
+    """Barèmes saisis dans la table ; les lignes incomplètes sont ignorées."""
+    models = []
+    for row in df_scenarios.itertuples(index=False):
+        if not row.name or row.crystallization not in CRYSTALLIZATIONS:
+            continue
+        rates = [getattr(row, field) for field in PERCENT_FIELDS]
+        models.append(FeeModel(
+            *(0.0 if pd.isna(rate) else float(rate) / 100 for rate in rates),
+            high_water_mark=bool(row.high_water_mark) if not pd.isna(row.high_water_mark) else False,
+            crystallization=CRYSTALLIZATIONS[row.crystallization], name=str(row.name),
+        ))
+    return tuple(models)
+
+def build_scenarios_table(models, last_day, capital):
+    """Valeur nette finale, commissions (prélevées et provisionnées), impôt et gain net de chaque barème."""
+    valeur_nette = last_day['valeur_part_nette'][-1]
+    gain_net_perc = (valeur_nette - capital) / capital * 100 if capital > 0 else np.zeros(len(models))
+    return pd.DataFrame({
+        "Scénario": [m.name for m in models],
+        "Commission": last_day['frais_preleves'][-1] + last_day['frais_gestion'][-1],
+        "Impôt latent": last_day['taxe_latente'][-1],
+        "Valeur Nette": valeur_nette,
+        "Gain Net (%)": gain_net_perc,
+    })
+
+SCENARIOS_TABLE_COLUMNS = {
+    "Commission": st.column_config.NumberColumn(format="%.2f €"),
+    "Impôt latent": st.column_config.NumberColumn(format="%.2f €"),
+    "Valeur Nette": st.column_config.NumberColumn(format="%.2f €"),
+    "Gain Net (%)": st.column_config.NumberColumn(format="%.2f %%"),
+}
+
+def build_scenarios_figure(chart_data, models, investor):
+    """Valeur nette de l'investisseur sous chaque barème."""
+    fig = go.Figure()
+    for s, m in enumerate(models):
+        fig.add_trace(go.Scatter(x=chart_data['Date'], y=chart_data[f'scenario_{s}'], mode='lines', name=m.name))
+    fig.update_layout(
+        title_text=f"Valeur Nette selon le Barème de Frais pour {investor}",
+        xaxis_title='Date', yaxis_title='Montant en €', legend_title_text='Scénario'
+    )
+    return fig
+
+def build_chart_data(df_perf):
+    """
+    Séries des graphiques d'un investisseur, dérivées dans des tableaux
+    dédiés : `df_perf` (vue partagée/mémoïsée) n'est jamais modifié.
+    """
+    capital = df_perf['capital'].to_numpy()
+    gain_net = df_perf['valeur_part_nette'].to_numpy() - capital
+    perc_net_gain = np.zeros(len(capital))
+    np.divide(gain_net * 100, capital, out=perc_net_gain, where=capital > 0)
+    return {
+        'Date': df_perf['Date'].to_numpy(),
+        'capital': capital,
+        'valeur_part': df_perf['valeur_part'].to_numpy(),
+        'perc_net_gain': perc_net_gain,
+        'gain_area': np.where(perc_net_gain >= 0, perc_net_gain, np.nan),
+        'loss_area': np.where(perc_net_gain < 0, perc_net_gain, np.nan),
+    }
+
+def build_performance_figure(chart_data, investor):
+    """Graphique de la plus-value nette en % du capital apporté."""
+    fig_perc = go.Figure()
+    fig_perc.add_trace(go.Scatter(
+        x=chart_data['Date'], y=chart_data['gain_area'], fill='tozeroy', mode='none',
+        fillcolor='rgba(40, 167, 69, 0.3)', name='Gain Net'
+    ))
+    fig_perc.add_trace(go.Scatter(
+        x=chart_data['Date'], y=chart_data['loss_area'], fill='tozeroy', mode='none',
+        fillcolor='rgba(220, 53, 69, 0.3)', name='Perte Nette'
+    ))
+    fig_perc.add_trace(go.Scatter(
+        x=chart_data['Date'], y=chart_data['perc_net_gain'], mode='lines',
+        line=dict(color='black', width=2), name='Performance Nette (%)'
+    ))
+    fig_perc.update_layout(
+        title_text=f"Évolution de la Plus-Value Nette en % du Capital pour {investor}",
+        yaxis_title="Plus-Value Nette (%)", yaxis_tickformat=".2f", showlegend=True,
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+    fig_perc.add_hline(y=0, line_dash="dash", line_color="grey")
+    return fig_perc
+
+def build_value_figure(chart_data, investor):
+    """Graphique du capital apporté vs. valeur brute."""
+    fig_abs = go.Figure()
+    fig_abs.add_trace(go.Scatter(x=chart_data['Date'], y=chart_data['capital'], mode='lines', name='Capital Apporté'))
+    fig_abs.add_trace(go.Scatter(x=chart_data['Date'], y=chart_data['valeur_part'], mode='lines', name='Valeur Brute'))
+    fig_abs.update_layout(
+        title_text=f"Évolution du Capital Apporté vs. Valeur Brute pour {investor}",
+        xaxis_title='Date', yaxis_title='Montant en €', legend_title_text='Légende'
+    )
+    return fig_abs
+
+def displayed_model(ledger):
+    """Barème des grandeurs nettes affichées : celui du registre (artefacts), sinon le barème par défaut."""
+    return ledger.fee_model or DEFAULT_MODEL
+
+def display_tab(ledger, df_apports, window):
     """
     Affiche l'analyse détaillée pour un investisseur sélectionné.
+
+    Seule la performance nette (mémoïsée) de l'investisseur affiché est
+    calculée. `window` est la fenêtre des graphiques, les KPIs viennent
+    toujours du dernier jour calculé. KPIs, graphiques et TRI net sont
+    tous évalués sous le même barème, `displayed_model(ledger)`.
     """
     st.header("Analyse par Investisseur")
+    model = displayed_model(ledger)
 
     # --- Sélection de l'investisseur ---
-    investors = sorted(df_apports['NomInvestisseur'].unique().tolist())
+    investors = sorted(ledger.investors)
     selected_investor = st.selectbox('Sélectionnez un investisseur :', investors)
 
     if selected_investor:
-        # --- Préparation des noms de colonnes ---
-        capital_col = f'capital_{selected_investor}'
-        gain_brut_col = f'gain_brut_{selected_investor}'
-        valeur_brute_col = f'valeur_part_{selected_investor}'
-        valeur_nette_col = f'valeur_part_nette_{selected_investor}'
-        frais_col = f'frais_gestion_{selected_investor}'
-        taxe_col = f'taxe_latente_{selected_investor}'
-        
-        # --- Données du dernier jour ---
-        last_day_data = df_perf.iloc[-1]
+        # --- Vue de l'investisseur sélectionné (sans les colonnes des autres) ---
+        capital_col = 'capital'
+        gain_brut_col = 'gain_brut'
+        valeur_brute_col = 'valeur_part'
+        valeur_nette_col = 'valeur_part_nette'
+        frais_col = 'frais_gestion'
+        preleves_col = 'frais_preleves'
+        taxe_col = 'taxe_latente'
+        df_perf = get_net_performance(ledger, ledger.cache_key, selected_investor, **window, model=model)
+
+        # --- Données du dernier jour (dernier état NAV, indépendant de la fenêtre) ---
+        last_day_data = get_net_performance(ledger, ledger.cache_key, selected_investor, start=ledger.dates[-1], model=model).iloc[-1]
         capital = last_day_data[capital_col]
         gain_brut = last_day_data[gain_brut_col]
         gain_net = last_day_data[valeur_nette_col] - capital
@@ -58,8 +242,9 @@ def display_tab(df_perf, df_apports):
             | Description | Montant |
             | :--- | ---: |
             | Valeur Brute de la part | **{format_eur(last_day_data[valeur_brute_col])}** |
-            | Moins : Frais de gestion accumulés | {format_eur(-last_day_data[frais_col])} |
-            | Moins : Impôt latent estimé (30%) | {format_eur(-last_day_data[taxe_col])} |
+            | Moins : Frais de gestion prélevés (périodes closes) | {format_eur(-last_day_data[preleves_col])} |
+            | Moins : Frais de gestion de la période en cours | {format_eur(-last_day_data[frais_col])} |
+            | Moins : Impôt latent estimé ({model.tax_rate * 100:.0f}%) | {format_eur(-last_day_data[taxe_col])} |
             | **Égal : Valeur Nette Estimée** | **{format_eur(last_day_data[valeur_nette_col])}** |
             | | |
             | Moins : Capital Total Apporté | {format_eur(-capital)} |
@@ -71,48 +256,48 @@ def display_tab(df_perf, df_apports):
         # --- GRAPHIQUE DE PERFORMANCE EN % (NETTE) ---
         st.subheader("Performance Nette en Pourcentage du Capital Apporté")
 
-        gain_net_col = f'gain_net_{selected_investor}'
-        perc_net_gain_col = f'perc_net_gain_{selected_investor}'
-        df_perf[gain_net_col] = df_perf[valeur_nette_col] - df_perf[capital_col]
-        df_perf.loc[df_perf[capital_col] > 0, perc_net_gain_col] = (df_perf[gain_net_col] / df_perf[capital_col]) * 100
-        df_perf[perc_net_gain_col] = df_perf[perc_net_gain_col].fillna(0)
-        
-        df_perf['gain_area'] = df_perf[perc_net_gain_col].where(df_perf[perc_net_gain_col] >= 0)
-        df_perf['loss_area'] = df_perf[perc_net_gain_col].where(df_perf[perc_net_gain_col] < 0)
-
-        fig_perc = go.Figure()
-        fig_perc.add_trace(go.Scatter(
-            x=df_perf['Date'], y=df_perf['gain_area'], fill='tozeroy', mode='none',
-            fillcolor='rgba(40, 167, 69, 0.3)', name='Gain Net'
-        ))
-        fig_perc.add_trace(go.Scatter(
-            x=df_perf['Date'], y=df_perf['loss_area'], fill='tozeroy', mode='none',
-            fillcolor='rgba(220, 53, 69, 0.3)', name='Perte Nette'
-        ))
-        fig_perc.add_trace(go.Scatter(
-            x=df_perf['Date'], y=df_perf[perc_net_gain_col], mode='lines',
-            line=dict(color='black', width=2), name='Performance Nette (%)'
-        ))
-        fig_perc.update_layout(
-            title_text=f"Évolution de la Plus-Value Nette en % du Capital pour {selected_investor}",
-            yaxis_title="Plus-Value Nette (%)", yaxis_tickformat=".2f", showlegend=True,
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-        )
-        fig_perc.add_hline(y=0, line_dash="dash", line_color="grey")
+        chart_data = prepare_series(build_chart_data(df_perf), 'Date', ['perc_net_gain', 'capital', 'valeur_part'])
+        profiling.record_frame('perf_nette', df_perf)
+        with profiling.stage('figures'):
+            fig_perc = build_performance_figure(chart_data, selected_investor)
+            fig_abs = build_value_figure(chart_data, selected_investor)
         st.plotly_chart(fig_perc, use_container_width=True)
 
         st.markdown("---")
 
         # --- GRAPHIQUE DE PERFORMANCE EN VALEUR ---
         st.subheader("Performance en Valeur Absolue")
-        fig_abs = px.line(
-            df_perf, x='Date', y=[capital_col, valeur_brute_col],
-            title=f"Évolution du Capital Apporté vs. Valeur Brute pour {selected_investor}",
-            labels={'value': 'Montant en €', 'variable': 'Légende'}
-        )
-        fig_abs.for_each_trace(lambda t: t.update(name=t.name.replace(capital_col, 'Capital Apporté')))
-        fig_abs.for_each_trace(lambda t: t.update(name=t.name.replace(valeur_brute_col, 'Valeur Brute')))
         st.plotly_chart(fig_abs, use_container_width=True)
 
+        st.markdown("---")
+
+        # --- SCÉNARIOS DE FRAIS ---
+        st.subheader("Scénarios de Frais")
+        st.caption("Modifiez ou ajoutez des barèmes : ils sont tous évalués en une seule passe.")
+        df_scenarios = st.data_editor(
+            # Le barème affiché en premier, suivi des autres barèmes par défaut
+            scenarios_frame((model, *(m for m in DEFAULT_SCENARIOS if m != model and m != DEFAULT_MODEL))), column_config=SCENARIO_COLUMNS,
+            num_rows="dynamic", hide_index=True, use_container_width=True, key='scenarios_frais'
+        )
+        models = models_from_frame(df_scenarios)
+        if models:
+            dates, net = get_fee_scenarios(ledger, ledger.cache_key, selected_investor, models, **window)
+            _, last_day = get_fee_scenarios(ledger, ledger.cache_key, selected_investor, models, start=ledger.dates[-1])
+            st.dataframe(build_scenarios_table(models, last_day, capital), column_config=SCENARIOS_TABLE_COLUMNS,
+                         hide_index=True, use_container_width=True)
+            scenario_data = {'Date': dates, **{f'scenario_{s}': net['valeur_part_nette'][:, s] for s in range(len(models))}}
+            scenario_data = prepare_series(scenario_data, 'Date', [f'scenario_{s}' for s in range(len(models))])
+            with profiling.stage('figures'):
+                fig_scenarios = build_scenarios_figure(scenario_data, models, selected_investor)
+            st.plotly_chart(fig_scenarios, use_container_width=True)
+
         with st.expander("Voir le détail des apports"):
-            st.dataframe(df_apports[df_apports['NomInvestisseur'] == selected_investor])
\ No newline at end of file
+            st.dataframe(df_apports[df_apports['NomInvestisseur'] == selected_investor])
+
+    # --- Comparaison de tous les investisseurs (table triable) ---
+    st.markdown("---")
+    st.subheader("Comparaison des Investisseurs")
+    df_metrics, current_volatility = get_investor_metrics(ledger, ledger.cache_key, model)
+    st.dataframe(build_metrics_table(df_metrics), column_config=METRICS_COLUMNS, hide_index=True, use_container_width=True)
+    if not np.isnan(current_volatility):
+        st.caption(f"Volatilité glissante du portefeuille sur {ROLLING_WINDOW} jours : {current_volatility * 100:.2f} %")
\ No newline at end of file
@@ -0,0 +1,123 @@
+# tests/test_fees.py
+"""
+Moteur de frais (`fees_and_taxes`) comparé à des boucles jour par jour :
+la version d'origine d'`apply_fees_and_taxes` pour le barème par défaut,
+et une boucle de référence pour le high-water mark, le hurdle et les
+cristallisations trimestrielle et mensuelle.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.fees import DEFAULT_MODEL, FeeModel, apply_fees_and_taxes, fees_and_taxes
+from dashboard.ledger import build_ledger
+from dashboard.nav import compute_units
+
+
+def synthetic_ledger(seed=0, start='2015-06-15', n_days=1100, n_investors=4):
+    """Registre sur trois ans commençant en cours d'année, avec retraits et baisses."""
+    rng = np.random.default_rng(seed)
+    inflows = np.where(rng.random((n_days, n_investors)) < 0.02, rng.normal(800, 600, (n_days, n_investors)).round(2), 0.0)
+    inflows[0] = 1000.0
+    portfolio_value = np.cumsum(inflows.sum(axis=1)) * np.exp(np.cumsum(rng.normal(0.0004, 0.01, n_days)))
+    dates = pd.date_range(start, periods=n_days, freq='D')
+    investors = [f'investisseur_{j}' for j in range(n_investors)]
+    return build_ledger(dates, portfolio_value, inflows, investors, compute_units(inflows, portfolio_value))
+
+
+def original_fees(dates, valeur_part, capital):
+    """`apply_fees_and_taxes` d'origine (main.py), pour un investisseur : commission annuelle de 2 %, impôt de 30 %."""
+    df_net = pd.DataFrame({'Date': dates, 'valeur_part': valeur_part, 'capital': capital})
+    df_net['year'] = df_net['Date'].dt.year
+    df_net['day_of_year'] = df_net['Date'].dt.dayofyear
+    df_net['days_in_year'] = df_net['Date'].dt.is_leap_year.map({True: 366, False: 365})
+    df_net['gain_brut'] = df_net['valeur_part'] - df_net['capital']
+    df_net['taxe_latente'] = df_net['gain_brut'].clip(lower=0) * 0.30
+    valeur_debut_annee = df_net.groupby('year')['valeur_part'].transform('first')
+    capital_debut_annee = df_net.groupby('year')['capital'].transform('first')
+    profit_annee = (df_net['valeur_part'] - valeur_debut_annee) - (df_net['capital'] - capital_debut_annee)
+    df_net['frais_gestion'] = profit_annee.clip(lower=0) * 0.02 * (df_net['day_of_year'] / df_net['days_in_year'])
+    df_net['valeur_part_nette'] = df_net['valeur_part'] - df_net['taxe_latente'] - df_net['frais_gestion']
+    return df_net
+
+
+def reference_fees(dates, valeur_part, capital, model):
+    """Boucle jour par jour : provision de la période en cours, commissions des périodes closes cumulées."""
+    periods = dates.to_period(model.crystallization)
+    gain = valeur_part - capital
+    provision, preleves = np.zeros(len(dates)), np.zeros(len(dates))
+    start, mark, carried = 0, -np.inf, 0.0
+    for i in range(len(dates)):
+        if i == 0 or periods[i] != periods[i - 1]:
+            if i > 0:
+                carried += provision[i - 1]
+            start, mark = i, max(mark, gain[i])
+        reference = mark if model.high_water_mark else gain[start]
+        elapsed_days = (dates[i] - periods[i].start_time).days + 1
+        period_days = (periods[i].end_time - periods[i].start_time).days + 1
+        year_days = 366 if dates[i].is_leap_year else 365
+        base = valeur_part[start] + capital[i] - capital[start]
+        profit = gain[i] - reference - model.hurdle * base * elapsed_days / year_days
+        provision[i] = max(profit, 0) * model.fee_rate * elapsed_days / period_days
+        preleves[i] = carried
+    taxe = np.clip(gain, 0, None) * model.tax_rate
+    return {'taxe_latente': taxe, 'frais_gestion': provision, 'frais_preleves': preleves,
+            'valeur_part_nette': valeur_part - taxe - provision - preleves}
+
+
+def test_default_model_matches_original_loop():
+    ledger = apply_fees_and_taxes(synthetic_ledger())
+    for j in range(len(ledger.investors)):
+        expected = original_fees(ledger.dates, ledger.matrices['valeur_part'][:, j], ledger.matrices['capital'][:, j])
+        for field in ('gain_brut', 'taxe_latente', 'frais_gestion'):
+            np.testing.assert_allclose(ledger.matrices[field][:, j], expected[field], rtol=1e-12, atol=1e-9)
+        # Seul écart voulu : les commissions des années closes restent déduites
+        year_end = np.r_[expected['year'].to_numpy()[1:] != expected['year'].to_numpy()[:-1], False]
+        carried = np.r_[0.0, np.cumsum(np.where(year_end, expected['frais_gestion'], 0.0))[:-1]]
+        np.testing.assert_allclose(ledger.matrices['frais_preleves'][:, j], carried, rtol=1e-12, atol=1e-9)
+        np.testing.assert_allclose(
+            ledger.matrices['valeur_part_nette'][:, j], expected['valeur_part_nette'] - carried, rtol=1e-12, atol=1e-9
+        )
+
+
+@pytest.mark.parametrize('model', [
+    DEFAULT_MODEL,
+    FeeModel(fee_rate=0.2, high_water_mark=True),
+    FeeModel(fee_rate=0.1, hurdle=0.05),
+    FeeModel(fee_rate=0.1, high_water_mark=True, crystallization='Q'),
+    FeeModel(fee_rate=0.15, hurdle=0.03, high_water_mark=True, crystallization='M'),
+], ids=['defaut', 'hwm', 'hurdle', 'hwm_trimestriel', 'hurdle_hwm_mensuel'])
+def test_fees_match_reference_loop(model):
+    ledger = synthetic_ledger(seed=1)
+    net = fees_and_taxes(ledger.matrices['valeur_part'], ledger.matrices['capital'], ledger.calendar, model)
+    for j in range(len(ledger.investors)):
+        expected = reference_fees(ledger.dates, ledger.matrices['valeur_part'][:, j], ledger.matrices['capital'][:, j], model)
+        for field, values in expected.items():
+            np.testing.assert_allclose(net[field][:, j], values, rtol=1e-12, atol=1e-9, err_msg=field)
+
+
+def test_single_model_matches_one_item_list():
+    ledger = synthetic_ledger(seed=2)
+    model = FeeModel(fee_rate=0.1, hurdle=0.02, high_water_mark=True, crystallization='Q')
+    rows = np.arange(100, 900, 7)
+    single = fees_and_taxes(ledger.matrices['valeur_part'], ledger.matrices['capital'], ledger.calendar, model, rows)
+    batched = fees_and_taxes(ledger.matrices['valeur_part'], ledger.matrices['capital'], ledger.calendar, [model], rows)
+    assert single.keys() == batched.keys()
+    for field in single:
+        np.testing.assert_array_equal(single[field], batched[field][0])
+
+
+def test_crystallization_frequencies_charge_comparable_fees():
+    """Gain régulier : sur une année, la commission totale ne dépend guère de la fréquence de cristallisation."""
+    dates = pd.date_range('2016-01-01', '2016-12-31', freq='D')
+    inflows = np.r_[1000.0, np.zeros(len(dates) - 1)][:, None]
+    portfolio_value = 1000.0 * (1 + 0.10 * np.arange(len(dates)) / len(dates))
+    ledger = build_ledger(dates, portfolio_value, inflows, ['a'], compute_units(inflows, portfolio_value))
+    valeur_part, capital = ledger.matrices['valeur_part'][:, 0], ledger.matrices['capital'][:, 0]
+    totals = {}
+    for freq in ('Y', 'Q', 'M'):
+        net = fees_and_taxes(valeur_part, capital, ledger.calendar, FeeModel(fee_rate=0.1, tax_rate=0.0, crystallization=freq))
+        totals[freq] = net['frais_gestion'][-1] + net['frais_preleves'][-1]
+    assert totals['Y'] == pytest.approx(10.0, rel=0.01)
+    assert totals['Q'] == pytest.approx(totals['Y'], rel=0.02)
+    assert totals['M'] == pytest.approx(totals['Y'], rel=0.05)
@@ -0,0 +1,93 @@
+# tests/test_metrics.py
+"""
+Indicateurs vectorisés de `dashboard.metrics` comparés à des calculs
+investisseur par investisseur : TRI par dichotomie, drawdown et
+volatilité par boucle sur la période de détention.
+"""
+import numpy as np
+import pandas as pd
+
+from dashboard.metrics import DAYS_PER_YEAR, entry_rows, max_drawdowns, money_weighted_irr, volatilities
+
+
+def irr_bisection(flow_dates, flows, end_date, terminal_value, low=-0.99, high=10.0, n_iter=200):
+    """TRI d'un investisseur par dichotomie sur V - somme des a_k (1 + r)^(durée_k)."""
+    years = (end_date - flow_dates).days.to_numpy() / DAYS_PER_YEAR
+
+    def residual(rate):
+        return terminal_value - (flows * (1 + rate) ** years).sum()
+
+    for _ in range(n_iter):
+        middle = (low + high) / 2
+        if residual(low) * residual(middle) <= 0:
+            high = middle
+        else:
+            low = middle
+    return (low + high) / 2
+
+
+def synthetic_nav(n_days=900, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.exp(np.cumsum(rng.normal(0.0003, 0.012, n_days)))
+
+
+def test_irr_matches_bisection_with_withdrawals():
+    dates = pd.date_range('2020-03-01', periods=1500, freq='D')
+    apports = np.zeros((len(dates), 4))
+    apports[0, 0], apports[400, 0] = 1000.0, 500.0
+    apports[10, 1], apports[700, 1], apports[1200, 1] = 2000.0, -600.0, 300.0  # retrait en cours de route
+    apports[100, 2], apports[900, 2] = 800.0, -200.0
+    apports[1490, 3] = 1000.0  # entrée quelques jours avant la fin
+    terminal_values = np.array([1900.0, 1650.0, 520.0, 1003.0])
+
+    irr = money_weighted_irr(dates, apports, terminal_values)
+
+    for j in range(apports.shape[1]):
+        rows = np.flatnonzero(apports[:, j])
+        expected = irr_bisection(dates[rows], apports[rows, j], dates[-1], terminal_values[j])
+        assert abs(irr[j] - expected) < 1e-8, (j, irr[j], expected)
+
+
+def test_irr_is_nan_without_flows_or_convergence():
+    dates = pd.date_range('2021-01-01', periods=800, freq='D')
+    apports = np.zeros((len(dates), 3))
+    apports[0, 0] = apports[0, 1] = 1000.0
+    # Colonne 0 : aucun taux ne rend la valeur finale négative ; colonne 2 : aucun apport
+    irr = money_weighted_irr(dates, apports, np.array([-100.0, 1300.0, 0.0]))
+    assert np.isnan(irr[0]) and np.isfinite(irr[1]) and np.isnan(irr[2])
+    # Itérations épuisées avant convergence
+    assert np.isnan(money_weighted_irr(dates, apports, np.array([1300.0, 1300.0, 0.0]), max_iter=1)[:2]).all()
+
+
+def test_max_drawdowns_match_per_investor_loop():
+    nav = synthetic_nav()
+    apports = np.zeros((len(nav), 4))
+    apports[0, 0], apports[250, 1], apports[899, 2] = 1.0, 1.0, 1.0  # colonne 3 : jamais entré
+    entries = entry_rows(apports)
+
+    drawdowns = max_drawdowns(nav, entries)
+
+    nav_ext = np.r_[1.0, nav]
+    for j, entry in enumerate(entries[:3]):
+        peak, worst = -np.inf, 0.0
+        for value in nav_ext[entry:]:
+            peak = max(peak, value)
+            worst = min(worst, value / peak - 1)
+        assert abs(drawdowns[j] - worst) < 1e-12
+    assert np.isnan(drawdowns[3])
+
+
+def test_volatilities_match_per_investor_loop():
+    nav = synthetic_nav(seed=1)
+    apports = np.zeros((len(nav), 4))
+    apports[0, 0], apports[300, 1], apports[899, 2] = 1.0, 1.0, 1.0
+    entries = entry_rows(apports)
+
+    vol = volatilities(nav, entries)
+
+    log_returns = np.diff(np.log(np.r_[1.0, nav]))
+    for j in range(2):
+        expected = np.std(log_returns[entries[j]:], ddof=1) * np.sqrt(DAYS_PER_YEAR)
+        assert abs(vol[j] - expected) < 1e-10
+    # Un seul rendement depuis l'entrée, ou jamais entré : pas de volatilité
+    assert np.isnan(vol[2]) and np.isnan(vol[3])
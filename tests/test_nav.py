@@ -0,0 +1,110 @@
+# tests/test_nav.py
+"""
+Parité du moteur NAV vectorisé (`compute_units`, `resume_units`) avec la
+boucle jour par jour d'origine, sur les fichiers de `data/` et sur des
+apports aléatoires (retraits et jours à valeur nulle compris).
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.nav import compute_units
+from dashboard.nav_state import resume_units
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+
+def reference_units(inflows, portfolio_value):
+    """Boucle d'origine (main.py avant vectorisation), jour par jour et investisseur par investisseur."""
+    n_days, n_investors = inflows.shape
+    units = np.zeros((n_days, n_investors))
+    total_units = np.zeros(n_days)
+    nav = np.ones(n_days)
+    for i in range(n_days):
+        nav_yesterday = nav[i - 1] if i > 0 else 1.0
+        units_yesterday = total_units[i - 1] if i > 0 else 0
+        new_units_today = 0
+        for j in range(n_investors):
+            inflow_today = inflows[i, j]
+            new_units = inflow_today / nav_yesterday if nav_yesterday > 0 else inflow_today
+            units[i, j] = (units[i - 1, j] if i > 0 else 0) + new_units
+            new_units_today += new_units
+        total_units[i] = units_yesterday + new_units_today
+        if total_units[i] > 0:
+            nav[i] = portfolio_value[i] / total_units[i]
+        elif i > 0:
+            nav[i] = nav_yesterday
+    return units, total_units, nav
+
+
+def data_inputs():
+    """Apports et valeur globale construits sur `data/` comme le faisait la version d'origine."""
+    df_apports = pd.read_excel(f'{DATA_DIR}/apports_investisseurs.xlsx')
+    df_apports.columns = ['Date', 'NomInvestisseur', 'Montant', 'SourcePlacement']
+    df_apports['Date'] = pd.to_datetime(df_apports['Date'])
+    df_pea = pd.read_excel(f'{DATA_DIR}/performance_pea.xlsx', usecols=[0, 1])
+    df_pea.columns = ['Date', 'PEA']
+    df_pea = df_pea.set_index(pd.to_datetime(df_pea['Date']))['PEA']
+
+    dates = pd.date_range(df_apports['Date'].min(), df_pea.index.max(), freq='D')
+    portfolio_value = df_pea.reindex(dates, method='ffill').fillna(0).to_numpy()
+    for _, apports_source in df_apports[df_apports['SourcePlacement'].str.upper() != 'PEA'].groupby('SourcePlacement'):
+        portfolio_value = portfolio_value + apports_source.groupby('Date')['Montant'].sum().cumsum() \
+            .reindex(dates, method='ffill').fillna(0).to_numpy()
+    inflows = df_apports.pivot_table(index='Date', columns='NomInvestisseur', values='Montant', aggfunc='sum') \
+        .reindex(dates).fillna(0)
+    return dates, inflows.to_numpy(), portfolio_value, inflows.columns.tolist()
+
+
+def random_inputs(seed, n_days=400, n_investors=5):
+    """Apports épars avec retraits, valeur du portefeuille parfois nulle."""
+    rng = np.random.default_rng(seed)
+    inflows = np.where(rng.random((n_days, n_investors)) < 0.03, rng.normal(500, 400, (n_days, n_investors)).round(2), 0.0)
+    inflows[:10] = 0.0
+    inflows[10, 0] = 1000.0
+    portfolio_value = np.cumsum(inflows.sum(axis=1)) * np.exp(np.cumsum(rng.normal(0, 0.01, n_days)))
+    portfolio_value[rng.random(n_days) < 0.02] = 0.0
+    dates = pd.date_range('2023-01-01', periods=n_days, freq='D')
+    return dates, inflows, portfolio_value, [f'investisseur_{j}' for j in range(n_investors)]
+
+
+def assert_same_units(actual, expected):
+    for got, want in zip(actual, expected):
+        np.testing.assert_allclose(got, want, rtol=1e-12, atol=1e-9)
+
+
+def test_compute_units_matches_loop_on_data():
+    _, inflows, portfolio_value, _ = data_inputs()
+    assert_same_units(compute_units(inflows, portfolio_value), reference_units(inflows, portfolio_value))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_compute_units_matches_loop_on_random_inflows(seed):
+    _, inflows, portfolio_value, _ = random_inputs(seed)
+    assert (inflows < 0).any() and (portfolio_value == 0).any()
+    assert_same_units(compute_units(inflows, portfolio_value), reference_units(inflows, portfolio_value))
+
+
+@pytest.mark.parametrize('inputs', [data_inputs, lambda: random_inputs(7)], ids=['data', 'aleatoire'])
+def test_resume_units_matches_loop_after_past_edit(inputs, tmp_path):
+    dates, inflows, portfolio_value, investors = inputs()
+    state_file = str(tmp_path / 'nav_state.npz')
+    assert_same_units(
+        resume_units(dates, inflows, portfolio_value, investors, 'v1', state_file),
+        reference_units(inflows, portfolio_value),
+    )
+
+    # Apport ajouté en cours d'historique : reprise à partir de ce jour seulement
+    edited = inflows.copy()
+    edited[len(dates) // 2, 0] += 250.0
+    assert_same_units(
+        resume_units(dates, edited, portfolio_value, investors, 'v2', state_file),
+        reference_units(edited, portfolio_value),
+    )
+    # État inchangé : relu tel quel
+    assert_same_units(
+        resume_units(dates, edited, portfolio_value, investors, 'v2', state_file),
+        reference_units(edited, portfolio_value),
+    )
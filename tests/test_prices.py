@@ -0,0 +1,104 @@
+# tests/test_prices.py
+"""
+Stock local de cours et mise à jour incrémentale, avec le fournisseur
+`CsvPriceProvider` à la place du réseau.
+"""
+import pandas as pd
+
+import dashboard.cache
+from dashboard.positions import PositionsStore, first_held_dates
+from dashboard.prices import CsvPriceProvider, PriceStore, price_table, update_prices
+
+ISIN_A, ISIN_B = 'FR0000120172', 'FR0013451333'
+
+
+def write_prices_csv(path, rows):
+    """Fichier du fournisseur CSV : isin;date;close, décimales à la virgule."""
+    lines = ['isin;date;close'] + [f"{isin};{date};{str(close).replace('.', ',')}" for isin, date, close in rows]
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return str(path)
+
+
+def positions_store(tmp_path, monkeypatch, snapshots):
+    """Relevés {nom de fichier: [(nom, isin, quantité, dernier cours)]}, lus avec un cache Parquet propre au test."""
+    monkeypatch.setattr(dashboard.cache, 'CACHE_DIR', str(tmp_path / '.cache'))
+    positions_dir = tmp_path / 'Positions'
+    positions_dir.mkdir()
+    for name, lines in snapshots.items():
+        (positions_dir / name).write_text(
+            'name;isin;quantity;buyingPrice;lastPrice;intradayVariation;amount;amountVariation;variation\n' + ''.join(
+                f"{line};{isin};{str(quantity).replace('.', ',')};0;{str(last_price).replace('.', ',')};0;0;0;0\n"
+                for line, isin, quantity, last_price in lines
+            ),
+            encoding='utf-8',
+        )
+    return PositionsStore(str(positions_dir)).load_all()
+
+
+def stored_store(tmp_path, rows):
+    store = PriceStore(str(tmp_path / 'prices.parquet'))
+    store.append(pd.DataFrame(rows, columns=['isin', 'date', 'close']))
+    return store
+
+
+def test_update_appends_only_rows_after_each_last_stored_date(tmp_path):
+    store = stored_store(tmp_path, [(ISIN_A, '2025-07-02', 10.0), (ISIN_B, '2025-07-01', 20.0)])
+    provider = CsvPriceProvider(write_prices_csv(tmp_path / 'cours.csv', [
+        (ISIN_A, '2025-07-01', 99.0),  # antérieur au stock de A : ignoré
+        (ISIN_A, '2025-07-02', 99.0),  # déjà stocké pour A : ignoré
+        (ISIN_A, '2025-07-03', 11.0),
+        (ISIN_B, '2025-07-02', 21.0),
+        (ISIN_B, '2025-07-03', 22.0),
+    ]))
+
+    first_dates = pd.Series(pd.to_datetime(['2025-06-30', '2025-06-30']), index=[ISIN_A, ISIN_B])
+    assert update_prices(store, provider, first_dates, today='2025-07-03')
+
+    reloaded = PriceStore(store.path).prices
+    closes = {(isin, date.strftime('%Y-%m-%d')): close for isin, date, close in reloaded.itertuples(index=False)}
+    assert closes == {
+        (ISIN_A, '2025-07-02'): 10.0, (ISIN_A, '2025-07-03'): 11.0,
+        (ISIN_B, '2025-07-01'): 20.0, (ISIN_B, '2025-07-02'): 21.0, (ISIN_B, '2025-07-03'): 22.0,
+    }
+
+
+def test_update_offline_keeps_store_untouched(tmp_path):
+    store = stored_store(tmp_path, [(ISIN_A, '2025-07-01', 10.0)])
+    before = PriceStore(store.path).prices
+    offline = CsvPriceProvider(str(tmp_path / 'absent.csv'))
+
+    first_dates = pd.Series(pd.to_datetime(['2025-06-30', '2025-06-30']), index=[ISIN_A, ISIN_B])
+    assert not update_prices(store, offline, first_dates, today='2025-07-10')
+
+    pd.testing.assert_frame_equal(PriceStore(store.path).prices, before)
+    pd.testing.assert_frame_equal(store.prices, before)
+
+
+def test_new_lines_start_at_their_first_snapshot(tmp_path, monkeypatch):
+    positions = positions_store(tmp_path, monkeypatch, {
+        'Juin_2025.csv': [('CARREFOUR', ISIN_A, 10.0, 12.0)],
+        'Juillet_2025.csv': [('CARREFOUR', ISIN_A, 10.0, 12.3), ('FDJ', ISIN_B, 5.0, 30.26)],
+    })
+    store = PriceStore(str(tmp_path / 'prices.parquet'))
+    provider = CsvPriceProvider(write_prices_csv(tmp_path / 'cours.csv', [
+        (ISIN_A, '2025-06-29', 11.0), (ISIN_A, '2025-06-30', 12.0), (ISIN_A, '2025-07-31', 12.3),
+        (ISIN_B, '2025-06-30', 29.0), (ISIN_B, '2025-07-31', 30.26),
+    ]))
+
+    assert update_prices(store, provider, first_held_dates(positions), today='2025-07-31')
+
+    first_stored = store.prices.groupby('isin')['date'].min()
+    assert first_stored.to_dict() == {ISIN_A: pd.Timestamp('2025-06-30'), ISIN_B: pd.Timestamp('2025-07-31')}
+
+
+def test_price_table_prefers_stored_closes_over_snapshot_last_price(tmp_path, monkeypatch):
+    positions = positions_store(tmp_path, monkeypatch, {
+        'Juillet_2025.csv': [('CARREFOUR', ISIN_A, 10.0, 12.3), ('FDJ', ISIN_B, 5.0, 30.26)],
+    })
+    store = stored_store(tmp_path, [(ISIN_A, '2025-07-31', 12.5)])
+
+    table = price_table(store, positions)
+
+    as_of = pd.Timestamp('2025-07-31')
+    assert table.loc[as_of, ISIN_A] == 12.5   # cours stocké
+    assert table.loc[as_of, ISIN_B] == 30.26  # pas de cours stocké : lastPrice du relevé
@@ -0,0 +1,76 @@
+# tests/test_schema.py
+"""
+Validation des tables d'entrée par leur schéma : numéros de ligne des
+erreurs, correspondance des en-têtes, typage et bornes.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.schema import APPORTS, SOURCES, VALUE_SERIES, SchemaError, validate
+
+
+def apports(**overrides):
+    data = {
+        'Date': ['2024-01-05', '2024-02-05', '2024-03-05'],
+        'NomInvestisseur': ['Alice', 'Bob', 'Alice'],
+        'Montant': [100.0, 250.0, 75.0],
+        'SourcePlacement': ['PEA', 'Livret', 'PEA'],
+    }
+    data.update(overrides)
+    return pd.DataFrame(data)
+
+
+def test_error_lines_are_file_lines_with_blank_rows_skipped():
+    df = apports(
+        Date=['2024-01-05', None, 'pas une date', '2024-03-05'],
+        NomInvestisseur=['Alice', None, 'Bob', 'Alice'],
+        Montant=[100.0, None, 250.0, 'beaucoup'],
+        SourcePlacement=['PEA', None, 'Livret', 'PEA'],
+    )
+
+    with pytest.raises(SchemaError) as error:
+        validate(df, APPORTS, 'apports.xlsx')
+
+    # En-tête en ligne 1 : la ligne vide est la ligne 3 du fichier et n'est pas signalée
+    rows = error.value.rows
+    assert rows[['ligne', 'colonne']].values.tolist() == [[4, 'Date'], [5, 'Montant']]
+    assert rows['valeur'].tolist() == ['pas une date', 'beaucoup']
+    assert 'apports.xlsx' in str(error.value) and 'ligne 4' in str(error.value)
+
+
+def test_headers_match_aliases_case_and_spacing():
+    df = apports().rename(columns={'NomInvestisseur': '  investisseur ', 'SourcePlacement': 'SOURCE', 'Montant': 'montant'})
+    df['Commentaire'] = ['a', 'b', 'c']
+
+    typed = validate(df, APPORTS)
+
+    assert list(typed.columns) == ['Date', 'NomInvestisseur', 'Montant', 'SourcePlacement', 'Commentaire']
+    assert typed['NomInvestisseur'].dtype == 'category'
+    assert pd.api.types.is_datetime64_any_dtype(typed['Date'])
+
+
+def test_missing_required_column_is_reported_on_header_line():
+    with pytest.raises(SchemaError) as error:
+        validate(apports().drop(columns='Montant'), APPORTS)
+    assert error.value.rows[['ligne', 'colonne']].values.tolist() == [[1, 'Montant']]
+
+
+def test_numbers_are_downcast_to_float32_only_when_lossless():
+    lossless = validate(pd.DataFrame({'Date': ['2024-01-01', '2024-01-02'], 'Valeur': [1500.0, 0.5]}), VALUE_SERIES)
+    lossy = validate(pd.DataFrame({'Date': ['2024-01-01', '2024-01-02'], 'Valeur': [1500.0, 0.1]}), VALUE_SERIES)
+
+    assert lossless['Valeur'].dtype == np.float32
+    assert lossy['Valeur'].dtype == np.float64
+    assert lossy['Valeur'].tolist() == [1500.0, 0.1]
+
+
+def test_bounds_reject_out_of_range_values():
+    df = pd.DataFrame({'NomSource': ['Livret', 'Compte', 'Fonds'], 'Taux': [3.0, 150.0, -1.0]})
+
+    with pytest.raises(SchemaError) as error:
+        validate(df, SOURCES)
+
+    assert error.value.rows[['ligne', 'colonne']].values.tolist() == [[3, 'Taux'], [4, 'Taux']]
+    # Colonne facultative vide : acceptée
+    assert validate(df.assign(Taux=[3.0, None, 100.0]), SOURCES)['Taux'].isna().tolist() == [False, True, False]
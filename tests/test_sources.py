@@ -0,0 +1,71 @@
+# tests/test_sources.py
+"""
+Valorisation des sources : formes fermées des méthodes à taux comparées à
+un cumul jour par jour, et lecture de la table des sources.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.sources import SourceSpec, parse_source_specs, source_values
+
+DATES = pd.date_range('2023-01-01', periods=800, freq='D')
+
+
+def daily_inflows():
+    """Apports épars, dont un retrait partiel."""
+    inflows = np.zeros(len(DATES))
+    inflows[0], inflows[90], inflows[400], inflows[650] = 1000.0, 500.0, -700.0, 250.0
+    return inflows
+
+
+def test_fixed_rate_matches_daily_simple_interest():
+    inflows = daily_inflows()
+    values = source_values(SourceSpec('Livret', 'taux_fixe', rate=0.05), DATES, inflows)
+
+    # Intérêts simples : chaque jour, le capital de la veille rapporte r / 365
+    capital = interest = 0.0
+    expected = []
+    for inflow in inflows:
+        interest += 0.05 / 365 * capital
+        capital += inflow
+        expected.append(capital + interest)
+    np.testing.assert_allclose(values, expected, rtol=1e-12)
+
+
+def test_daily_compounding_matches_daily_accrual():
+    inflows = daily_inflows()
+    values = source_values(SourceSpec('Compte', 'capitalisation_quotidienne', rate=0.04), DATES, inflows)
+
+    growth = (1 + 0.04) ** (1 / 365)
+    value = 0.0
+    expected = []
+    for inflow in inflows:
+        value = value * growth + inflow
+        expected.append(value)
+    np.testing.assert_allclose(values, expected, rtol=1e-12)
+
+
+def test_parse_source_specs_reads_rate_and_value_file():
+    df_sources = pd.DataFrame({
+        'NomSource': ['Livret', 'Crypto', 'PEA', 'Espèces'],
+        'TypeSource': ['Livret', 'Crypto', 'PEA', None],
+        'Valorisation': ['taux_fixe', 'serie', None, None],
+        'Taux': [3.5, None, None, None],
+        'FichierValorisation': [None, 'valeurs/crypto.xlsx', None, None],
+    })
+
+    specs = parse_source_specs(df_sources, pea_perf_file='perso/performance_pea.xlsx', data_dir='perso')
+
+    assert specs['Livret'] == SourceSpec('Livret', 'taux_fixe', rate=0.035)
+    assert specs['Crypto'].value_file == os.path.join('perso', 'valeurs/crypto.xlsx')
+    assert specs['PEA'] == SourceSpec('PEA', 'serie', value_file='perso/performance_pea.xlsx')
+    assert specs['Espèces'] == SourceSpec('Espèces', 'apports')
+
+
+def test_parse_source_specs_rejects_unknown_method():
+    df_sources = pd.DataFrame({'NomSource': ['Livret'], 'Valorisation': ['interets_composes']})
+    with pytest.raises(ValueError, match='interets_composes'):
+        parse_source_specs(df_sources)